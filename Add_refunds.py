@@ -1,13 +1,81 @@
 import pandas as pd
 import numpy as np
 import os
-
-print("--- Step 1: Loading All Datasets ---")
+import time
+import argparse
+
+import data_store
+import dedup_index
+import enrich
+import ingest
+import prewarm
+import stores
+import validation
+
+# Har storefront apne folder mein (stores.py dekho): python Add_refunds.py --store <name>
+parser = argparse.ArgumentParser(description="BearCart ETL with refunds")
+parser.add_argument('--store', default=stores.DEFAULT_STORE)
+parser.add_argument('--sessions-batch', action='append', default=[],
+                    help="new website_sessions CSV to dedup against history and append (repeatable)")
+args = parser.parse_args()
+store_name = args.store
+store_paths = stores.paths(store_name)
+sessions_file = stores.input_path(store_name, 'website_sessions.csv')
+pipeline_start = time.perf_counter()
+
+# Data quality checks raw inputs par hi chalte hain (imputation se pehle),
+# loader threads ke andar; referential checks Step 3b mein
+quality = validation.QualityReport()
+bad_order_lines = validation.BadLines()
+
+# Orders aur refunds ki preprocessing sessions par depend nahi karti, isliye
+# ye unke loader thread mein hi chalti hai (bade sessions read ke saath overlap)
+def prepare_orders(orders):
+    validation.check_source(quality, 'orders', orders)
+    orders['created_at'] = pd.to_datetime(orders['created_at'])
+    # Filling Null Prices & Costs
+    orders['price_usd'] = orders['price_usd'].fillna(orders['price_usd'].mean())
+    orders['cogs_usd'] = orders['cogs_usd'].fillna(orders['cogs_usd'].mean())
+    return orders
+
+def prepare_refunds(order_item_refunds):
+    validation.check_source(quality, 'refunds', order_item_refunds)
+    # Refunds item level par hote hain, hum unhe Order level par sum karenge
+    return order_item_refunds.groupby('order_id')['refund_amount_usd'].sum().reset_index()
+
+# Sessions ka persistent dedup index (website_session_id -> row hash)
+session_index = dedup_index.DedupIndex(os.path.join(store_paths.root, dedup_index.DEDUP_DIR))
+
+if args.sessions_batch:
+    print("--- Step 0: Appending New Session Batches ---")
+    try:
+        for batch_file in args.sessions_batch:
+            batch_stats = session_index.append_batch(batch_file, sessions_file)
+            print(f"{batch_file}: {batch_stats['rows']:,} rows -> {batch_stats['new']:,} new, "
+                  f"{batch_stats['duplicates']:,} already seen, {batch_stats['conflicts']:,} conflicts")
+    except FileNotFoundError as e:
+        print(f"Error: {e}. Please check the session batch path.")
+        exit()
+    except (KeyError, ValueError) as e:
+        print(f"Error in session batch {batch_file}: {e}")
+        exit()
+    print()
+
+print(f"--- Step 1: Loading All Datasets (concurrently) [store: {store_name}] ---")
 try:
-    products = pd.read_csv('products.csv')
-    orders = pd.read_csv('orders.csv', on_bad_lines='skip', engine='python')
-    website_sessions = pd.read_csv('website_sessions.csv')
-    order_item_refunds = pd.read_csv('order_item_refunds.csv') # New File Loaded
+    loaded, load_timings = ingest.load_sources({
+        'website_sessions': ingest.source(sessions_file,
+                                          prepare=validation.checker(quality, 'website_sessions')),
+        'orders': ingest.source(stores.input_path(store_name, 'orders.csv'), prepare=prepare_orders,
+                                on_bad_lines=bad_order_lines, engine='python'),  # skipped lines counted
+        'refunds': ingest.source(stores.input_path(store_name, 'order_item_refunds.csv'), prepare=prepare_refunds), # New File Loaded
+        'products': ingest.source(stores.input_path(store_name, 'products.csv'),
+                                  prepare=validation.checker(quality, 'products')),
+    })
+    website_sessions = loaded['website_sessions']
+    orders = loaded['orders']
+    refunds_grouped = loaded['refunds']
+    products = loaded['products']
     print("Files loaded successfully.")
 except FileNotFoundError as e:
     print(f"Error: {e}. Please ensure all CSV files are in the folder.")
@@ -18,7 +86,12 @@ except Exception as e:
 
 # --- Step 2: Cleaning Sessions (Standard Procedure) ---
 print("\n--- Cleaning Sessions ---")
-sessions_clean = website_sessions.drop_duplicates().copy()
+# Keyed dedup on website_session_id (full-row hash se conflicts alag); file
+# unchanged ho to index ki stored drop list, poora frame dobara hash nahi hota
+sessions_clean, dedup_stats = session_index.history_rows(website_sessions, sessions_file)
+sessions_clean = sessions_clean.copy()
+print(f"Duplicate sessions dropped: {dedup_stats['rows'] - dedup_stats['new']:,} "
+      f"({dedup_stats['conflicts']:,} conflicting, index {'rebuilt' if dedup_stats['rebuilt'] else 'reused'})")
 sessions_clean['created_at'] = pd.to_datetime(sessions_clean['created_at'])
 
 # Standardize UTMs
@@ -40,51 +113,36 @@ sessions_clean['utm_campaign'] = sessions_clean['utm_campaign'].fillna('uncatego
 
 # --- Step 3: Processing Refunds (New Logic) ---
 print("\n--- Processing Refunds ---")
-# Refunds item level par hote hain, hum unhe Order level par sum karenge
-refunds_grouped = order_item_refunds.groupby('order_id')['refund_amount_usd'].sum().reset_index()
+# Order level sum Step 1 mein loader ke saath ho chuka hai
 print(f"Total Refunded Orders Found: {len(refunds_grouped)}")
 
 
-# --- Step 4: Cleaning Orders & Merging Refunds ---
-print("\n--- Processing Orders & Financials ---")
-orders['created_at'] = pd.to_datetime(orders['created_at'])
-
-# Mapping Missing User IDs
-user_map = sessions_clean.set_index('website_session_id')['user_id'].to_dict()
-orders['user_id'] = orders['user_id'].fillna(orders['website_session_id'].map(user_map))
+# --- Step 3b: Data Quality Report ---
+print("\n--- Data Quality Checks ---")
+bad_order_lines.report_to(quality, 'orders')
+validation.check_references(quality, sessions_clean, orders, products, refunds_grouped)
+print(quality.summary())
+quality_file = quality.save(os.path.join(store_paths.root, validation.REPORT_FILE))
+print(f"Quality report saved: {quality_file}")
 
-# Filling Null Prices & Costs
-orders['price_usd'] = orders['price_usd'].fillna(orders['price_usd'].mean())
-orders['cogs_usd'] = orders['cogs_usd'].fillna(orders['cogs_usd'].mean())
 
-# Merging Refunds into Orders Table
-orders = pd.merge(orders, refunds_grouped, on='order_id', how='left')
+# --- Step 4: Cleaning Orders & Merging Refunds ---
+print("\n--- Processing Orders & Financials ---")
+# Dates aur null prices/costs Step 1 mein prepare_orders ne fix kar diye
 
-# Filling NaN Refunds with 0 (Kyunki jinka refund nahi hua wo 0 hain)
-orders['refund_amount_usd'] = orders['refund_amount_usd'].fillna(0)
+# Mapping Missing User IDs (dense session_id -> row lookup, no dict)
+orders['user_id'] = enrich.fill_user_ids(orders, sessions_clean)
 
-# Creating 'is_refunded' Flag (1 = Refunded, 0 = No Refund)
-orders['is_refunded'] = np.where(orders['refund_amount_usd'] > 0, 1, 0)
+# Attaching Refunds to Orders Table by order_id lookup
+# (jinka refund nahi hua wo 0, aur 'is_refunded' flag: 1 = Refunded, 0 = No Refund)
+orders = enrich.attach_refunds(orders, refunds_grouped)
 
 
 # --- Step 5: The Master Merge ---
 print("\n--- Creating Master Sheet ---")
-# Merging Sessions with Orders (now containing Refund info)
-master_df = pd.merge(
-    sessions_clean,
-    orders[['website_session_id', 'order_id', 'price_usd', 'cogs_usd', 'refund_amount_usd', 'is_refunded', 'items_purchased', 'primary_product_id']], 
-    on='website_session_id',
-    how='left'
-)
-
-# Adding Product Names
-master_df = pd.merge(
-    master_df,
-    products[['product_id', 'product_name']],
-    left_on='primary_product_id',
-    right_on='product_id',
-    how='left'
-)
+# Sessions + Orders (now containing Refund info) + Product Names,
+# gathered through dense id lookup arrays instead of two merges
+master_df = enrich.build_master(sessions_clean, orders, products)
 
 # --- Step 6: Final Calculations ---
 print("\n--- Calculating Final Profit ---")
@@ -104,9 +162,19 @@ master_df['month_year'] = master_df['created_at'].dt.to_period('M').astype(str)
 master_df['product_name'] = master_df['product_name'].fillna('No Purchase')
 
 # --- Step 7: Export ---
-output_file = 'BearCart_Full_Analytics_With_Refunds.csv'
-master_df.to_csv(output_file, index=False)
+output_file = store_paths.csv
+# Temp file + os.replace: dashboard / prewarm kabhi aadhi likhi CSV nahi padhte
+tmp_output = data_store.tmp_path(output_file)
+master_df.to_csv(tmp_output, index=False)
+os.replace(tmp_output, output_file)
 
 print(f"\nSUCCESS! File generated: {output_file}")
 print(f"Total Refunds Recorded: ${master_df['refund_amount_usd'].sum():,.2f}")
-print(f"New Columns Added: 'is_refunded', 'refund_amount_usd', 'adjusted_net_profit'")
\ No newline at end of file
+print(f"New Columns Added: 'is_refunded', 'refund_amount_usd', 'adjusted_net_profit'")
+pipeline_seconds = time.perf_counter() - pipeline_start
+print(f"Validation overhead: {quality.total_seconds:.2f}s of {pipeline_seconds:.2f}s ETL "
+      f"({quality.total_seconds / pipeline_seconds:.1%}, per-source checks overlap the loads)")
+
+# --- Step 8: Pre-warm Dashboard Cache ---
+print("\n--- Pre-warming Dashboard Views ---")
+prewarm.run(output_file, store_paths.store_dir)
\ No newline at end of file
@@ -2,13 +2,20 @@ import pandas as pd
 import numpy as np
 import os
 
+import ingest
+
 # --- STEP 1: Files Load Karna ---
 # Ensure karein ki ye saari files usi folder me hon jaha ye script hai
 try:
-    print("Files load ho rahi hain...")
-    products = pd.read_csv('products.csv')
-    orders = pd.read_csv('orders.csv')
-    website_sessions = pd.read_csv('website_sessions.csv')
+    print("Files load ho rahi hain (ek saath, thread pool mein)...")
+    loaded, load_timings = ingest.load_sources({
+        'products': ingest.source('products.csv'),
+        'orders': ingest.source('orders.csv'),
+        'website_sessions': ingest.source('website_sessions.csv'),
+    })
+    products = loaded['products']
+    orders = loaded['orders']
+    website_sessions = loaded['website_sessions']
     print("Sabhi files safaltapurvak load ho gayi hain.")
 except FileNotFoundError as e:
     print(f"Error: Koi file missing hai. Kripya check karein: {e}")
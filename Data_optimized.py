@@ -2,12 +2,19 @@ import pandas as pd
 import numpy as np
 import os
 
+import ingest
+
 print("--- Step 1: Data Loading ---")
 # Ensure karein ki raw files same folder mein ho
 try:
-    products = pd.read_csv('products.csv')
-    orders = pd.read_csv('orders.csv')
-    website_sessions = pd.read_csv('website_sessions.csv')
+    loaded, load_timings = ingest.load_sources({
+        'products': ingest.source('products.csv'),
+        'orders': ingest.source('orders.csv'),
+        'website_sessions': ingest.source('website_sessions.csv'),
+    })
+    products = loaded['products']
+    orders = loaded['orders']
+    website_sessions = loaded['website_sessions']
     print("Files loaded successfully.")
 except FileNotFoundError as e:
     print(f"Error: {e}. Please check filenames.")
@@ -0,0 +1,266 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import dedup_index
+import enrich
+import validation
+
+# ======================================================
+# ETL BENCHMARKS
+# ======================================================
+#   python benchmarks.py enrich                   (real CSV files)
+#   python benchmarks.py enrich --synthetic 5000000
+#   python benchmarks.py validation --synthetic 5000000
+#   python benchmarks.py dedup --history 4000000 --batch 50000
+#
+# Har stage ka wall time aur tracemalloc peak memory print hota hai.
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def synthetic_inputs(n_sessions, order_rate=0.07, seed=0):
+    """Sessions / orders / refunds / products shaped like the BearCart exports."""
+    rng = np.random.default_rng(seed)
+    session_ids = np.arange(1, n_sessions + 1)
+    sessions = pd.DataFrame({
+        "website_session_id": session_ids,
+        "created_at": pd.Timestamp("2012-03-19") + pd.to_timedelta(session_ids * 60, unit="s"),
+        "user_id": rng.integers(1, n_sessions // 2 + 2, n_sessions),
+        "is_repeat_session": rng.integers(0, 2, n_sessions),
+        "utm_source": rng.choice(["gsearch", "bsearch", "socialbook", "organic", "direct"], n_sessions),
+        "utm_campaign": rng.choice(["nonbrand", "brand", "uncategorized"], n_sessions),
+        "utm_content": rng.choice(["g_ad_1", "b_ad_1", None], n_sessions),
+        "device_type": rng.choice(["desktop", "mobile"], n_sessions),
+        "http_referer": rng.choice(["https://www.gsearch.com", None], n_sessions),
+    })
+
+    order_sessions = np.sort(rng.choice(session_ids, int(n_sessions * order_rate), replace=False))
+    n_orders = len(order_sessions)
+    product_ids = rng.integers(1, 5, n_orders)
+    orders = pd.DataFrame({
+        "order_id": np.arange(1, n_orders + 1),
+        "created_at": sessions["created_at"].to_numpy()[order_sessions - 1],
+        "website_session_id": order_sessions,
+        "user_id": sessions["user_id"].to_numpy()[order_sessions - 1].astype("float64"),
+        "primary_product_id": product_ids,
+        "items_purchased": rng.integers(1, 3, n_orders),
+        "price_usd": np.round(rng.uniform(29.99, 59.99, n_orders), 2),
+        "cogs_usd": np.round(rng.uniform(9.49, 22.49, n_orders), 2),
+    })
+
+    refunded = np.sort(rng.choice(orders["order_id"].to_numpy(), max(1, n_orders // 20), replace=False))
+    refunds = pd.DataFrame({
+        "order_item_refund_id": np.arange(1, len(refunded) + 1),
+        "created_at": orders["created_at"].to_numpy()[refunded - 1] + pd.Timedelta(days=14),
+        "order_item_id": refunded,
+        "order_id": refunded,
+        "refund_amount_usd": rng.uniform(5, 60, len(refunded)).round(2),
+    })
+
+    products = pd.DataFrame({
+        "product_id": [1, 2, 3, 4],
+        "created_at": pd.to_datetime(["2012-03-19 08:00", "2013-01-06 13:00", "2013-12-12 09:00", "2014-02-05 10:00"]),
+        "product_name": ["The Original Mr. Fuzzy", "The Forever Love Bear",
+                         "The Birthday Sugar Panda-v2", "The Hudson River Mini bear"],
+    })
+    return sessions, orders, refunds, products
+
+
+def load_inputs(args):
+    if args.synthetic:
+        return synthetic_inputs(args.synthetic)
+    sessions = pd.read_csv("website_sessions.csv").drop_duplicates()
+    orders = pd.read_csv("orders.csv", on_bad_lines="skip", engine="python")
+    refunds = pd.read_csv("order_item_refunds.csv")
+    products = pd.read_csv("products.csv")
+    return sessions, orders, refunds, products
+
+
+def merge_path(sessions, orders, refunds_grouped, products):
+    # Purana Add_refunds.py path: dict map + 3 pd.merge
+    orders = orders.copy()
+    user_map = sessions.set_index("website_session_id")["user_id"].to_dict()
+    orders["user_id"] = orders["user_id"].fillna(orders["website_session_id"].map(user_map))
+    orders = pd.merge(orders, refunds_grouped, on="order_id", how="left")
+    orders["refund_amount_usd"] = orders["refund_amount_usd"].fillna(0)
+    orders["is_refunded"] = np.where(orders["refund_amount_usd"] > 0, 1, 0)
+    return enrich.build_master_merge(sessions, orders, products)
+
+
+def lookup_path(sessions, orders, refunds_grouped, products):
+    orders = orders.copy()
+    orders["user_id"] = enrich.fill_user_ids(orders, sessions)
+    orders = enrich.attach_refunds(orders, refunds_grouped)
+    return enrich.build_master(sessions, orders, products)
+
+
+def enrich_benchmark(args):
+    sessions, orders, refunds, products = load_inputs(args)
+    refunds_grouped = refunds.groupby("order_id")["refund_amount_usd"].sum().reset_index()
+    print(f"Sessions: {len(sessions):,}  Orders: {len(orders):,}  Refunded orders: {len(refunds_grouped):,}")
+
+    results = {}
+    print(f"{'path':<10}{'seconds':>10}{'peak_mb':>12}")
+    for name, func in [("merge", merge_path), ("lookup", lookup_path)]:
+        best = None
+        for _ in range(args.repeat):
+            master, elapsed, peak = measure(func, sessions, orders, refunds_grouped, products)
+            best = (elapsed, peak) if best is None or elapsed < best[0] else best
+        results[name] = master
+        print(f"{name:<10}{best[0]:>10.3f}{best[1]:>12.1f}")
+
+    pd.testing.assert_frame_equal(
+        results["merge"].reset_index(drop=True),
+        results["lookup"].reset_index(drop=True),
+        check_dtype=False,
+    )
+    print("Master tables match.")
+
+
+def inject_errors(sessions, orders, refunds, rng, n_bad=1000):
+    """Plant known problems so the validation counts can be checked."""
+    sessions, orders, refunds = sessions.copy(), orders.copy(), refunds.copy()
+    n_bad = min(n_bad, len(orders) // 10)
+    planted = {}
+
+    dup_rows = sessions.iloc[rng.choice(len(sessions), n_bad, replace=False)]
+    sessions = pd.concat([sessions, dup_rows], ignore_index=True)
+    planted[("website_sessions", "duplicate_key")] = n_bad
+
+    picks = rng.choice(len(orders), 4 * n_bad, replace=False)
+    price_null, negative_cogs, orphan, unknown_product = np.split(picks, 4)
+    orders.loc[price_null, "price_usd"] = np.nan
+    orders.loc[negative_cogs, "cogs_usd"] = -1.0
+    orders.loc[orphan, "website_session_id"] = len(sessions) * 10 + np.arange(n_bad)
+    orders.loc[unknown_product, "primary_product_id"] = 99
+    planted[("orders", "price_usd:null_mean_imputed")] = n_bad
+    planted[("orders", "cogs_usd:out_of_range")] = n_bad
+    planted[("orders", "orphan_session_id")] = n_bad
+    planted[("orders", "unknown_product_id")] = n_bad
+
+    orphan_refunds = min(n_bad, len(refunds))
+    refunds.loc[refunds.index[:orphan_refunds], "order_id"] = len(orders) * 10 + np.arange(orphan_refunds)
+    planted[("refunds", "orphan_order_id")] = orphan_refunds
+    return sessions, orders, refunds, planted
+
+
+def run_validation(sessions, orders, refunds, products):
+    report = validation.QualityReport()
+    for name, df in [("website_sessions", sessions), ("orders", orders), ("refunds", refunds),
+                     ("products", products)]:
+        validation.check_source(report, name, df)
+    refunds_grouped = refunds.groupby("order_id")["refund_amount_usd"].sum().reset_index()
+    validation.check_references(report, sessions.drop_duplicates("website_session_id"), orders,
+                                products, refunds_grouped)
+    return report
+
+
+def validation_benchmark(args):
+    sessions, orders, refunds, products = load_inputs(args)
+    planted = {}
+    if args.synthetic:
+        sessions, orders, refunds, planted = inject_errors(sessions, orders, refunds, np.random.default_rng(1))
+    print(f"Sessions: {len(sessions):,}  Orders: {len(orders):,}  Refunds: {len(refunds):,}")
+
+    refunds_grouped = refunds.groupby("order_id")["refund_amount_usd"].sum().reset_index()
+    orders_filled = orders.fillna({"price_usd": orders["price_usd"].mean()})
+    start = time.perf_counter()
+    lookup_path(sessions.drop_duplicates(), orders_filled, refunds_grouped, products)
+    etl_seconds = time.perf_counter() - start
+
+    # Timing tracemalloc ke bina; peak memory alag run se
+    start = time.perf_counter()
+    report = run_validation(sessions, orders, refunds, products)
+    seconds = time.perf_counter() - start
+    _, _, peak = measure(run_validation, sessions, orders, refunds, products)
+
+    print(f"{'stage':<22}{'seconds':>10}")
+    for stage, stage_seconds in report.seconds.items():
+        print(f"{stage:<22}{stage_seconds:>10.3f}")
+    print(f"{'validation total':<22}{seconds:>10.3f}  (peak {peak:.1f} MB)")
+    print(f"{'dedup + enrichment':<22}{etl_seconds:>10.3f}  (validation = {seconds / etl_seconds:.0%} of it)")
+    print(report.summary())
+
+    found = {(c["source"], c["check"]): c["failed"] for c in report.checks}
+    for key, expected in planted.items():
+        assert found.get(key) == expected, f"{key}: expected {expected}, found {found.get(key)}"
+    if planted:
+        print(f"All {len(planted)} planted problem counts detected exactly.")
+
+
+def session_batch(sessions, n_batch, rng):
+    """New sessions after the history, plus re-sent, conflicting and repeated rows."""
+    fresh = synthetic_inputs(len(sessions) + n_batch, order_rate=0.001)[0].iloc[len(sessions):]
+    picks = rng.choice(len(sessions), n_batch // 10 + n_batch // 100, replace=False)
+    resent = sessions.iloc[picks[:n_batch // 10]]
+    conflicting = sessions.iloc[picks[n_batch // 10:]].copy()
+    conflicting["device_type"] = "tablet"
+    batch = pd.concat([fresh, resent, conflicting, fresh.iloc[:n_batch // 100]], ignore_index=True)
+    return batch.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def dedup_benchmark(args):
+    rng = np.random.default_rng(2)
+    print(f"{'history':>12}{'batch':>10}{'drop_dup_s':>12}{'index_s':>10}{'new':>10}{'dups':>8}{'conflicts':>10}")
+    for n_history in (args.history // 4, args.history):
+        sessions = synthetic_inputs(n_history, order_rate=0.001)[0]
+        batch = session_batch(sessions, args.batch, rng)
+
+        # Purana tareeka: history + batch ka full-row drop_duplicates har run
+        start = time.perf_counter()
+        pd.concat([sessions, batch], ignore_index=True).drop_duplicates()
+        drop_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = dedup_index.DedupIndex(index_dir)
+            index.add(sessions)  # history ek baar index hoti hai (ETL rebuild)
+            index = dedup_index.DedupIndex(index_dir)  # naya run: sirf disk se khulta hai
+            start = time.perf_counter()
+            keep, stats = index.add(batch)
+            index_seconds = time.perf_counter() - start
+            size_mb = os.path.getsize(index.hash_path) / 1024 / 1024
+
+        assert (stats["new"], stats["duplicates"], stats["conflicts"]) == \
+            (args.batch, args.batch // 10 + args.batch // 100, args.batch // 100)
+        print(f"{n_history:>12,}{len(batch):>10,}{drop_seconds:>12.3f}{index_seconds:>10.3f}"
+              f"{stats['new']:>10,}{stats['duplicates']:>8,}{stats['conflicts']:>10,}  (index {size_mb:.0f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BearCart ETL benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enrich", help="Dense lookup enrichment vs pd.merge")
+    p.add_argument("--synthetic", type=int, help="Generate N synthetic sessions instead of reading CSVs")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=enrich_benchmark)
+
+    p = sub.add_parser("validation", help="Data quality checks: cost and planted-error recall")
+    p.add_argument("--synthetic", type=int, help="Generate N synthetic sessions (with planted errors)")
+    p.set_defaults(func=validation_benchmark)
+
+    p = sub.add_parser("dedup", help="Persistent session dedup index vs drop_duplicates")
+    p.add_argument("--history", type=int, default=4_000_000)
+    p.add_argument("--batch", type=int, default=50_000)
+    p.set_defaults(func=dedup_benchmark)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,18 @@
+import os
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+
+import data_store
+import export
+import kpi_engine
+import sampling
+import stores
+import telemetry
+import view_cache
 
 # ======================================================
 # PAGE CONFIG
@@ -12,6 +23,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ======================================================
+# PERFORMANCE TELEMETRY
+# ======================================================
+@st.cache_resource
+def load_telemetry():
+    # Process-wide metrics: saare sessions ek hi object mein record karte hain
+    perf = telemetry.Telemetry()
+    telemetry.start_metrics_server(perf)
+    return perf
+
+perf = load_telemetry()
+rerun_timer = perf.begin_rerun()
+
 # ======================================================
 # PROFESSIONAL LIGHT THEME CSS
 # ======================================================
@@ -180,15 +204,100 @@ neutral_color = "#6c757d"
 # ======================================================
 # DATA LOAD
 # ======================================================
-@st.cache_data
-def load_data():
-    df = pd.read_csv("BearCart_Full_Analytics_With_Refunds.csv")
-    df["created_at"] = pd.to_datetime(df["created_at"])
-    df["price_usd"] = pd.to_numeric(df["price_usd"], errors="coerce")
-    df["is_conversion"] = pd.to_numeric(df["is_conversion"], errors="coerce")
-    return df
+# Kitne storefronts ke stores/samples ek saath memory mein khule reh sakte hain;
+# limit ke baad sabse purana evict hota hai (mmaps band, views disk par rehte hain)
+MAX_LOADED_STORES = int(os.environ.get("BEARCART_MAX_LOADED_STORES", "4"))
+
+
+@st.cache_resource
+def background_executor():
+    # Fast mode ke exact views; ye tasks store build ka wait kar sakte hain
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="bearcart-bg")
+
+
+@st.cache_resource
+def build_executor():
+    # Store builds alag pool mein: inke tasks kabhi kisi future ka wait nahi
+    # karte, isliye background_executor ke workers inpar block hokar bhi
+    # deadlock nahi kar sakte
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="bearcart-build")
+
+
+@st.cache_resource(max_entries=MAX_LOADED_STORES)
+def prepare_store(name, source_version):
+    # CSV -> column store check/build background mein; tab tak pehla page
+    # startup manifest se render hota hai
+    store_paths = stores.paths(name)
+    return build_executor().submit(data_store.ensure_store, store_paths.csv, store_paths.store_dir)
+
+
+@st.cache_resource(max_entries=MAX_LOADED_STORES)
+def load_store(name, version):
+    # Har storefront ka ek read-only, memory-mapped store saare sessions share
+    # karte hain. Store tabhi khulta hai jab koi use select kare.
+    perf.cache_miss("load_store")
+    return data_store.DataStore(stores.paths(name).store_dir)
+
+
+def get_store(name):
+    store_paths = stores.paths(name)
+    prepare_store(name, data_store.source_version(store_paths.csv)).result()
+    with perf.lookup("load_store"):
+        return load_store(name, data_store.current_version(store_paths.store_dir))
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_view(name, version, date_range, device, source):
+    # Pre-warm job ke banaye views pehle, warna yahin compute
+    perf.cache_miss("view")
+    store = get_store(name)
+    start = time.perf_counter()
+    view = view_cache.load_view(store, date_range, device, source)
+    perf.cache_lookup("view_disk", hit=view is not None, seconds=time.perf_counter() - start)
+    if view is None:
+        view = kpi_engine.compute_view(store.frame(store.select(date_range, device, source)))
+    return view
+
+
+@st.cache_resource(max_entries=MAX_LOADED_STORES)
+def load_sample(name, version):
+    # Fast mode ka stratified sample (pre-warm job ETL ke baad bana deta hai)
+    perf.cache_miss("sample")
+    return sampling.load_sample(get_store(name))
+
+
+def store_info(name):
+    """Version, date bounds and filter options of one store (manifest first)."""
+    store_paths = stores.paths(name)
+    prepare_store(name, data_store.source_version(store_paths.csv))
+    start = time.perf_counter()
+    manifest = data_store.load_manifest(store_paths.csv, store_paths.store_dir)
+    perf.cache_lookup("manifest", hit=manifest is not None, seconds=time.perf_counter() - start)
+    if manifest is not None:
+        # Cold start: bounds/options manifest se, store ka wait nahi
+        return {
+            "version": manifest["version"],
+            "min_date": datetime.date.fromisoformat(manifest["min_date"]),
+            "max_date": datetime.date.fromisoformat(manifest["max_date"]),
+            "devices": manifest["options"]["device_type"],
+            "sources": manifest["options"]["utm_source"],
+            "manifest": manifest,
+        }
+    store = get_store(name)
+    min_date, max_date = store.date_bounds()
+    return {
+        "version": store.version,
+        "min_date": min_date,
+        "max_date": max_date,
+        "devices": store.options("device_type"),
+        "sources": store.options("utm_source"),
+        "manifest": None,
+    }
+
+
+def union_options(lists):
+    return sorted(set().union(*lists))
 
-df = load_data()
 
 # ======================================================
 # SIDEBAR FILTERS
@@ -196,10 +305,41 @@ df = load_data()
 st.sidebar.title("Filters")
 st.sidebar.markdown("---")
 
+# Storefront selector: har store alag partition hai, sirf selected wale load hote hain
+available_stores = stores.list_stores()
+pending = stores.pending_stores()
+if not available_stores:
+    if pending:
+        st.warning("Store data is not built yet: " + ", ".join(pending) +
+                   ". Run `python Add_refunds.py --store <name>` to build it.")
+    else:
+        st.error("No store data found. Run Add_refunds.py first.")
+    st.stop()
+if pending:
+    st.sidebar.caption("Not built yet: " + ", ".join(pending))
+
+if len(available_stores) > 1:
+    st.sidebar.subheader("Storefront")
+    selected_stores = st.sidebar.multiselect("Select Stores", available_stores, default=available_stores[:1])
+    if not selected_stores:
+        st.warning("Select at least one store.")
+        st.stop()
+else:
+    selected_stores = available_stores
+
+infos = {name: store_info(name) for name in selected_stores}
+if len(selected_stores) == 1:
+    info = infos[selected_stores[0]]
+    device_list, source_list = info["devices"], info["sources"]
+else:
+    device_list = union_options(info["devices"] for info in infos.values())
+    source_list = union_options(info["sources"] for info in infos.values())
+min_date = min(info["min_date"] for info in infos.values())
+max_date = max(info["max_date"] for info in infos.values())
+rerun_timer.lap("load_data")
+
 # Date Range Filter
 st.sidebar.subheader("Date Range")
-min_date = df["created_at"].min().date()
-max_date = df["created_at"].max().date()
 date_range = st.sidebar.date_input(
     "Select Date Range",
     value=(min_date, max_date),
@@ -209,30 +349,56 @@ date_range = st.sidebar.date_input(
 
 # Device Filter with all types
 st.sidebar.subheader("Device Type")
-device_options = ["All"] + df["device_type"].dropna().unique().tolist()
+device_options = ["All"] + device_list
 selected_device = st.sidebar.selectbox("Select Device", device_options)
 
 # Source Filter
 st.sidebar.subheader("Marketing Source")
-source_options = ["All"] + df["utm_source"].dropna().unique().tolist()
+source_options = ["All"] + source_list
 selected_source = st.sidebar.selectbox("Select Source", source_options)
 
-# Apply Filters
-filtered_df = df.copy()
+st.sidebar.markdown("---")
+multi_store = len(selected_stores) > 1
+fast_mode = st.sidebar.toggle(
+    "Fast mode (approximate)",
+    help="Show sample-based KPIs with 95% confidence intervals first, then exact figures (single store only). "
+         "Charts below the KPIs wait for the exact figures.",
+    disabled=multi_store,
+)
+
+
+def view_args_for(name):
+    return (name, infos[name]["version"], tuple(date_range), selected_device, selected_source)
 
-if len(date_range) == 2:
-    filtered_df = filtered_df[
-        (filtered_df["created_at"].dt.date >= date_range[0]) & 
-        (filtered_df["created_at"].dt.date <= date_range[1])
-    ]
 
-if selected_device != "All":
-    filtered_df = filtered_df[filtered_df["device_type"] == selected_device]
+def manifest_default_view(name):
+    # Store ka poora history + All/All select ho to manifest wala default view
+    info = infos[name]
+    full_history = (len(date_range) == 2 and date_range[0] <= info["min_date"]
+                    and date_range[1] >= info["max_date"])
+    if info["manifest"] is None or not full_history or (selected_device, selected_source) != ("All", "All"):
+        return None
+    return kpi_engine.view_from_json(info["manifest"]["default_view"])
 
-if selected_source != "All":
-    filtered_df = filtered_df[filtered_df["utm_source"] == selected_source]
 
-orders_df = filtered_df[filtered_df["is_conversion"] == 1].drop_duplicates(subset="order_id")
+# Apply Filters (KPIs and charts come from the manifest / view cache; rows
+# are only gathered from the shared store for the explorer and exports)
+exact_seen = st.session_state.setdefault("exact_views", set())
+exact_future = None
+if fast_mode and not multi_store:
+    view_args = view_args_for(selected_stores[0])
+    if (view_args not in exact_seen and manifest_default_view(view_args[0]) is None
+            and not view_cache.has_view(get_store(view_args[0]), *view_args[2:])):
+        # Exact view background thread mein; tab tak sample se estimate dikhate hain
+        script_ctx = get_script_run_ctx()
+
+        def run_exact(args):
+            add_script_run_ctx(None, script_ctx)
+            with perf.lookup("view"):
+                return get_view(*args)
+
+        exact_future = background_executor().submit(run_exact, view_args)
+rerun_timer.lap("filters")
 
 # ======================================================
 # HEADER
@@ -246,28 +412,60 @@ st.markdown("---")
 # ======================================================
 st.subheader("Executive Summary")
 
+KPI_CARDS = [
+    [("Total Revenue", "total_revenue", "${:,.2f}"), ("Total Profit", "total_profit", "${:,.2f}"),
+     ("Total Orders", "total_orders", "{:,.0f}"), ("Avg Order Value", "aov", "${:,.2f}")],
+    [("Total Traffic", "total_traffic", "{:,.0f}"), ("Conversion Rate", "conversion_rate", "{:.2f}%"),
+     ("Items Sold", "items_sold", "{:,.0f}"), ("Estimated Refunds", "total_refunds", "${:,.2f}")],
+]
+
+
+def render_kpis(kpis, intervals=None):
+    # Display 8 KPIs in 2 rows of 4; approximate mode mein "± CI" bhi
+    # (kam sampled rows wale KPI ka estimate None aata hai - "Estimating...")
+    with kpi_placeholder.container():
+        for card_row in KPI_CARDS:
+            for col, (label, key, fmt) in zip(st.columns(4), card_row):
+                if intervals is None:
+                    value = fmt.format(kpis[key])
+                elif kpis[key] is None:
+                    value = "Estimating..."
+                else:
+                    value = f"≈ {fmt.format(kpis[key])} ± {fmt.format(intervals[key]).rstrip('%')}"
+                col.metric(label, value)
+
+
+kpi_placeholder = st.empty()
+kpi_status = st.empty()
+
 # KPI Calculations
-total_revenue = orders_df["price_usd"].sum()
-total_profit = orders_df["adjusted_net_profit"].sum() if "adjusted_net_profit" in orders_df.columns else 0
-total_orders = orders_df["order_id"].nunique()
-aov = (total_revenue / total_orders) if total_orders > 0 else 0
-total_traffic = filtered_df["website_session_id"].nunique()
-conversion_rate = (total_orders / total_traffic * 100) if total_traffic > 0 else 0
-items_sold = int(orders_df["items_purchased"].sum()) if "items_purchased" in orders_df.columns else 0
-total_refunds = orders_df["refund_amount_usd"].sum() if "refund_amount_usd" in orders_df.columns else 0
-
-# Display 8 KPIs in 2 rows of 4
-row1_c1, row1_c2, row1_c3, row1_c4 = st.columns(4)
-row1_c1.metric("Total Revenue", f"${total_revenue:,.2f}")
-row1_c2.metric("Total Profit", f"${total_profit:,.2f}")
-row1_c3.metric("Total Orders", f"{total_orders:,}")
-row1_c4.metric("Avg Order Value", f"${aov:,.2f}")
-
-row2_c1, row2_c2, row2_c3, row2_c4 = st.columns(4)
-row2_c1.metric("Total Traffic", f"{total_traffic:,}")
-row2_c2.metric("Conversion Rate", f"{conversion_rate:.2f}%")
-row2_c3.metric("Items Sold", f"{items_sold:,}")
-row2_c4.metric("Estimated Refunds", f"${total_refunds:,.2f}")
+if exact_future is not None:
+    store_name, data_version = view_args[:2]
+    with perf.lookup("sample"):
+        sample = load_sample(store_name, data_version)
+    estimates = sampling.estimate_kpis(get_store(store_name), sample, *view_args[2:])
+    render_kpis({k: v and v[0] for k, v in estimates.items()}, {k: v and v[1] for k, v in estimates.items()})
+    kpi_status.caption("Approximate figures from a stratified sample (95% CI). Computing exact numbers - "
+                       "charts load once they are ready...")
+    view = exact_future.result()
+    kpi_status.empty()
+    exact_seen.add(view_args)
+else:
+    # Multi-store: har store ka apna aggregate view, phir unka rollup
+    store_views = []
+    for name in selected_stores:
+        store_view = manifest_default_view(name)
+        if store_view is None:
+            # Har get_view call ek lookup; manifest se aaye views "manifest" cache mein gine jate hain
+            with perf.lookup("view"):
+                store_view = get_view(*view_args_for(name))
+            exact_seen.add(view_args_for(name))
+        store_views.append(store_view)
+    view = kpi_engine.combine_views(store_views)
+
+kpis = view["kpis"]
+render_kpis(kpis)
+rerun_timer.lap("kpis")
 
 st.markdown("---")
 
@@ -276,13 +474,13 @@ st.markdown("---")
 # ======================================================
 st.subheader("Trends and Strategy Analysis")
 
+# Plotly sirf charts tak pahunchne par load hota hai (KPIs pehle dikh jate hain)
+import plotly.graph_objects as go
+
 # Chart 1: Monthly Sales Trend (Full Width)
 st.markdown("#### Monthly Sales Trend")
 
-monthly_sales = orders_df.groupby(
-    orders_df["created_at"].dt.to_period("M")
-)["price_usd"].sum().reset_index()
-monthly_sales["created_at"] = monthly_sales["created_at"].astype(str)
+monthly_sales = view["monthly_sales"]
 
 fig_trend = go.Figure()
 fig_trend.add_trace(go.Scatter(
@@ -309,6 +507,7 @@ fig_trend.update_layout(
     plot_bgcolor="#ffffff"
 )
 st.plotly_chart(fig_trend, use_container_width=True)
+rerun_timer.lap("chart_monthly_sales")
 
 st.markdown("")
 
@@ -319,8 +518,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("#### Revenue by Marketing Channel")
     
-    channel_revenue = orders_df.groupby("utm_source")["price_usd"].sum().reset_index()
-    channel_revenue = channel_revenue.sort_values("price_usd", ascending=True)
+    channel_revenue = view["channel_revenue"]
     
     fig_channel = go.Figure()
     fig_channel.add_trace(go.Bar(
@@ -345,15 +543,13 @@ with col1:
         plot_bgcolor="#ffffff"
     )
     st.plotly_chart(fig_channel, use_container_width=True)
+rerun_timer.lap("chart_channel_revenue")
 
 # Chart 3: Monthly Orders Trend
 with col2:
     st.markdown("#### Monthly Orders Volume")
     
-    monthly_orders = orders_df.groupby(
-        orders_df["created_at"].dt.to_period("M")
-    )["order_id"].nunique().reset_index()
-    monthly_orders["created_at"] = monthly_orders["created_at"].astype(str)
+    monthly_orders = view["monthly_orders"]
     
     fig_orders = go.Figure()
     fig_orders.add_trace(go.Bar(
@@ -377,16 +573,14 @@ with col2:
         plot_bgcolor="#ffffff"
     )
     st.plotly_chart(fig_orders, use_container_width=True)
+rerun_timer.lap("chart_monthly_orders")
 
 st.markdown("")
 
 # Chart: Monthly Refunds Trend (Full Width)
 st.markdown("#### Monthly Refunds Trend")
 
-monthly_refunds = orders_df.groupby(
-    orders_df["created_at"].dt.to_period("M")
-)["refund_amount_usd"].sum().reset_index()
-monthly_refunds["created_at"] = monthly_refunds["created_at"].astype(str)
+monthly_refunds = view["monthly_refunds"]
 
 fig_refunds = go.Figure()
 fig_refunds.add_trace(go.Bar(
@@ -411,6 +605,7 @@ fig_refunds.update_layout(
     plot_bgcolor="#ffffff"
 )
 st.plotly_chart(fig_refunds, use_container_width=True)
+rerun_timer.lap("chart_monthly_refunds")
 
 st.markdown("---")
 
@@ -425,11 +620,7 @@ col3, col4 = st.columns(2)
 with col3:
     st.markdown("#### Device Performance Analysis")
     
-    device_stats = filtered_df.groupby("device_type").agg({
-        "is_conversion": ["sum", "count"]
-    }).reset_index()
-    device_stats.columns = ["device_type", "conversions", "sessions"]
-    device_stats["conversion_rate"] = (device_stats["conversions"] / device_stats["sessions"] * 100)
+    device_stats = view["device_stats"]
     
     fig_device = go.Figure()
     fig_device.add_trace(go.Pie(
@@ -460,16 +651,13 @@ with col3:
     device_table.columns = ["Device", "Sessions", "Conversions", "Conversion Rate (%)"]
     device_table["Conversion Rate (%)"] = device_table["Conversion Rate (%)"].round(2)
     st.dataframe(device_table, hide_index=True, use_container_width=True)
+rerun_timer.lap("chart_device")
 
 # Chart 5: Top Products of the bearcart
 with col4:
     st.markdown("#### Top Products by Revenue")
     
-    product_sales = orders_df.groupby("product_name").agg({
-        "items_purchased": "sum",
-        "price_usd": "sum"
-    }).reset_index()
-    product_sales = product_sales.sort_values("price_usd", ascending=True).tail(10)
+    product_sales = view["product_sales"].tail(10)
     
     fig_products = go.Figure()
     fig_products.add_trace(go.Bar(
@@ -494,6 +682,7 @@ with col4:
         plot_bgcolor="#ffffff"
     )
     st.plotly_chart(fig_products, use_container_width=True)
+rerun_timer.lap("chart_products")
 
 st.markdown("---")
 
@@ -504,13 +693,7 @@ st.subheader("Channel Performance Analysis")
 
 st.markdown("#### Sessions vs Conversion Rate by Source")
 
-source_analysis = filtered_df.groupby("utm_source").agg({
-    "website_session_id": "nunique",
-    "is_conversion": "sum"
-}).reset_index()
-source_analysis.columns = ["utm_source", "sessions", "conversions"]
-source_analysis["conversion_rate"] = (source_analysis["conversions"] / source_analysis["sessions"] * 100)
-source_analysis = source_analysis.sort_values("sessions", ascending=False)
+source_analysis = view["source_analysis"]
 
 fig_source = go.Figure()
 fig_source.add_trace(go.Bar(
@@ -549,18 +732,99 @@ fig_source.update_layout(
     plot_bgcolor="#ffffff"
 )
 st.plotly_chart(fig_source, use_container_width=True)
+rerun_timer.lap("chart_source")
 
 st.markdown("---")
 
 # ======================================================
-# DATA TABLE
+# ORDER EXPLORER
 # ======================================================
-with st.expander("View Raw Data"):
-    st.dataframe(
-        orders_df[["order_id", "created_at", "product_name", "price_usd", "items_purchased", "utm_source", "device_type"]].head(100),
-        hide_index=True,
-        use_container_width=True
-    )
+# Sort, search aur filters row index par chalte hain; browser ko sirf
+# current page ki rows bheji jati hain.
+st.subheader("Order Explorer")
+
+# Explorer aur export ko row-level store chahiye (background load yahan tak ho chuka hota hai).
+# Kai stores selected hon to rows ek store ki dikhate hain.
+explorer_store = selected_stores[0]
+if multi_store:
+    explorer_store = st.selectbox("Store", selected_stores)
+store = get_store(explorer_store)
+
+explorer_columns = ["order_id", "created_at", "product_name", "price_usd", "items_purchased",
+                    "utm_source", "utm_campaign", "utm_content", "device_type"]
+search_columns = ["product_name", "utm_source", "utm_campaign", "utm_content"]
+
+ex_c1, ex_c2, ex_c3 = st.columns([2, 2, 2])
+search_text = ex_c1.text_input("Search product / UTM", placeholder="e.g. fuzzy, brand, g_ad")
+product_filter = ex_c2.multiselect("Product", [p for p in store.options("product_name") if p != "No Purchase"])
+campaign_filter = ex_c3.multiselect("Campaign", store.options("utm_campaign"))
+
+ex_c4, ex_c5, ex_c6 = st.columns([2, 1, 1])
+sort_by = ex_c4.selectbox("Sort by", explorer_columns, index=explorer_columns.index("created_at"))
+sort_order = ex_c5.radio("Order", ["Descending", "Ascending"], horizontal=True)
+page_size = ex_c6.selectbox("Rows per page", [25, 50, 100, 250], index=2)
+
+explorer_rows = store.order_rows(store.select(date_range, selected_device, selected_source))
+explorer_rows = store.filter_rows(explorer_rows, {"product_name": product_filter, "utm_campaign": campaign_filter})
+explorer_rows = store.search_rows(explorer_rows, search_text, search_columns)
+explorer_rows = store.sort_rows(explorer_rows, sort_by, ascending=(sort_order == "Ascending"))
+
+total_matches = len(explorer_rows)
+page_count = max(1, -(-total_matches // page_size))
+page_number = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, step=1)
+
+page_df = store.page(explorer_rows, page_number - 1, page_size, explorer_columns)
+first_row = (page_number - 1) * page_size + 1 if total_matches else 0
+last_row = first_row + len(page_df) - 1 if total_matches else 0
+st.caption(f"Showing {first_row:,}-{last_row:,} of {total_matches:,} orders")
+st.dataframe(
+    page_df,
+    hide_index=True,
+    use_container_width=True
+)
+rerun_timer.lap("explorer")
+
+# Download: current filter selection ko chunks mein temp file par stream karte
+# hain, phir wahi file download hoti hai (poora frame memory mein nahi banta).
+# Prepared file apne filters se bandhi hai; filters badle to file hata dete hain.
+st.markdown("#### Download Filtered Data")
+dl_c1, dl_c2, dl_c3 = st.columns([1, 1, 2])
+export_level = dl_c1.radio("Level", ["Orders", "Sessions"], horizontal=True).lower()
+export_format = dl_c2.radio("Format", ["CSV", "Parquet"], horizontal=True).lower()
+export_selection = (explorer_store, infos[explorer_store]["version"], tuple(str(d) for d in date_range),
+                    selected_device, selected_source, export_level, export_format)
+
+prepared_export = st.session_state.get("export_file")
+if prepared_export is not None and prepared_export.selection != export_selection:
+    prepared_export.discard()
+    del st.session_state["export_file"]
+    prepared_export = None
+
+if dl_c3.button("Prepare Export"):
+    if prepared_export is not None:
+        prepared_export.discard()
+        del st.session_state["export_file"]
+        prepared_export = None
+    export_rows = export.export_rows(store, date_range, selected_device, selected_source, export_level)
+    try:
+        path = export.export_to_file(store, export_rows, export_format)
+        prepared_export = export.ExportFile(
+            path,
+            export_selection,
+            export.export_file_name(explorer_store, date_range, selected_device, selected_source,
+                                    export_level, export_format),
+            export.FORMATS[export_format][0],
+        )
+        st.session_state["export_file"] = prepared_export
+    except RuntimeError as e:
+        st.error(str(e))
+
+if prepared_export is not None and os.path.exists(prepared_export.path):
+    dl_c3.download_button("Download", prepared_export.reader(), file_name=prepared_export.name,
+                          mime=prepared_export.mime)
+st.caption("Very large selections: stream them from the KPI service instead "
+           "(GET /export?start=...&end=...&device=...&source=...&level=...&format=...).")
+rerun_timer.lap("export")
 
 # ======================================================
 # FOOTER
@@ -575,3 +839,38 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+rerun_timer.lap("footer")
+
+# ======================================================
+# ADMIN: PERFORMANCE PANEL (?admin=1)
+# ======================================================
+filter_state = {
+    "stores": selected_stores,
+    "date_range": [str(d) for d in date_range],
+    "device": selected_device,
+    "source": selected_source,
+    "fast_mode": fast_mode,
+}
+
+if st.query_params.get("admin") == "1":
+    snapshot = perf.snapshot()
+    with st.expander("Performance Telemetry", expanded=True):
+        st.caption(f"Rolling window of the last {snapshot['window']} samples per section. "
+                   f"Metrics endpoint: http://{telemetry.METRICS_HOST}:{telemetry.METRICS_PORT}/metrics(.json)")
+        if snapshot["sections"]:
+            st.markdown("**Section latency (ms)**")
+            st.dataframe(
+                pd.DataFrame.from_dict(snapshot["sections"], orient="index").round(2),
+                use_container_width=True
+            )
+        if snapshot["caches"]:
+            st.markdown("**Cache hit ratios**")
+            st.dataframe(
+                pd.DataFrame.from_dict(snapshot["caches"], orient="index").round(3),
+                use_container_width=True
+            )
+        if snapshot["slow_reruns"]:
+            st.markdown(f"**Slow reruns (>= {perf.slow_rerun_seconds:.1f}s)**")
+            st.json(snapshot["slow_reruns"][-10:])
+
+rerun_timer.finish(filter_state)
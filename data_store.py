@@ -0,0 +1,355 @@
+import os
+import json
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# SHARED COLUMN STORE
+# ======================================================
+# Master CSV ko ek baar per-column .npy files mein convert karte hain.
+# Dashboard in files ko mmap_mode="r" se kholta hai, isliye saare sessions
+# (aur processes) OS page cache ki same pages share karte hain - koi
+# per-session pickled copy nahi banti.
+
+SOURCE_FILE = "BearCart_Full_Analytics_With_Refunds.csv"
+STORE_DIR = ".bearcart_store"
+META_FILE = "meta.json"
+MANIFEST_FILE = "startup_manifest.json"
+LOCK_FILE = ".build.lock"
+
+try:
+    import fcntl
+except ImportError:  # Windows par flock nahi - wahan sirf unique temp names bachate hain
+    fcntl = None
+
+DATE_COLUMNS = ["created_at"]
+# Inhe hamesha category store karte hain: poora khali column (jaise bina paid
+# traffic wale store ka utm_content) pandas float64 NaN padhta hai
+TEXT_COLUMNS = ["utm_source", "utm_campaign", "utm_content", "device_type", "http_referer",
+                "product_name", "month_year"]
+
+
+def _stat_version(stat):
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+
+def _source_version(csv_path):
+    return _stat_version(os.stat(csv_path))
+
+
+def tmp_path(path):
+    """Per-writer temp name next to path, so two builders never share a .tmp file."""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+
+
+@contextmanager
+def build_lock(store_dir):
+    """Exclusive lock on store_dir while a build runs (threads aur processes dono ke liye)."""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def build_store(csv_path=SOURCE_FILE, store_dir=STORE_DIR):
+    """Convert the master CSV into a directory of memory-mappable columns."""
+    with build_lock(store_dir):
+        return _build_store(csv_path, store_dir)
+
+
+def _build_store(csv_path, store_dir):
+    # Version usi open handle se jo padh rahe hain - beech mein CSV replace ho
+    # jaye to bhi meta.json purane content ka hi version likhta hai
+    with open(csv_path, "rb") as f:
+        version = _stat_version(os.fstat(f.fileno()))
+        df = pd.read_csv(f)
+    os.makedirs(store_dir, exist_ok=True)
+
+    meta = {
+        "version": version,
+        "n_rows": len(df),
+        "columns": {},
+    }
+
+    for col in df.columns:
+        series = df[col]
+        if col in DATE_COLUMNS:
+            values = pd.to_datetime(series).to_numpy(dtype="datetime64[ns]").view("int64")
+            kind = {"kind": "datetime"}
+        elif col in ("price_usd", "is_conversion"):
+            values = pd.to_numeric(series, errors="coerce").to_numpy()
+            kind = {"kind": "numeric"}
+        elif col in TEXT_COLUMNS or not pd.api.types.is_numeric_dtype(series):
+            # Text columns -> integer codes + categories (first-appearance order,
+            # dropdown options bhi isi order mein aate hain)
+            codes, uniques = pd.factorize(series, sort=False)
+            values = codes.astype("int32")
+            kind = {"kind": "category", "categories": [str(u) for u in uniques]}
+        else:
+            values = series.to_numpy()
+            kind = {"kind": "numeric"}
+
+        # Temp file + os.replace: chalu dashboard ke purane mmaps purani file
+        # par hi rehte hain, beech mein truncate nahi hote
+        path = os.path.join(store_dir, f"{col}.npy")
+        tmp = tmp_path(path)
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(values))
+        os.replace(tmp, path)
+        meta["columns"][col] = kind
+
+    # meta.json sabse last mein likhte hain - yahi "store complete hai" ka marker hai
+    tmp_meta = tmp_path(os.path.join(store_dir, META_FILE))
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, os.path.join(store_dir, META_FILE))
+    return store_dir
+
+
+def source_version(csv_path=SOURCE_FILE):
+    """Version of the master CSV on disk (None if it is missing)."""
+    if not os.path.exists(csv_path):
+        return None
+    return _source_version(csv_path)
+
+
+def current_version(store_dir=STORE_DIR):
+    with open(os.path.join(store_dir, META_FILE)) as f:
+        return json.load(f)["version"]
+
+
+def _is_current(csv_path, store_dir):
+    meta_path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return not os.path.exists(csv_path) or meta.get("version") == _source_version(csv_path)
+
+
+def ensure_store(csv_path=SOURCE_FILE, store_dir=STORE_DIR):
+    """Build the store only if it is missing or older than the CSV."""
+    if _is_current(csv_path, store_dir):
+        return store_dir
+    with build_lock(store_dir):
+        # Lock ka wait karte waqt kisi aur builder ne shayad bana diya ho
+        if _is_current(csv_path, store_dir):
+            return store_dir
+        return _build_store(csv_path, store_dir)
+
+
+# ======================================================
+# STARTUP MANIFEST
+# ======================================================
+# Chhoti JSON file: date bounds, dropdown options aur default view ke KPIs /
+# chart series. Dashboard isse pehla page turant bana deta hai, poora store
+# background mein load hota rehta hai.
+
+def write_manifest(store, default_view, store_dir=STORE_DIR):
+    min_date, max_date = store.date_bounds()
+    manifest = {
+        "version": store.version,
+        "n_rows": store.n_rows,
+        "min_date": str(min_date),
+        "max_date": str(max_date),
+        "options": {col: store.options(col) for col in ("device_type", "utm_source")},
+        "default_view": default_view,
+    }
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    tmp = tmp_path(path)
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_manifest(csv_path=SOURCE_FILE, store_dir=STORE_DIR):
+    """Return the startup manifest if it matches the CSV on disk, else None."""
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    version = source_version(csv_path)
+    if version is not None and manifest.get("version") != version:
+        return None
+    return manifest
+
+
+class DataStore:
+    """Read-only, memory-mapped view of the master dataset."""
+
+    def __init__(self, store_dir=STORE_DIR):
+        with open(os.path.join(store_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.path = store_dir
+        self.version = self.meta["version"]
+        self.n_rows = self.meta["n_rows"]
+        self.kinds = {col: info["kind"] for col, info in self.meta["columns"].items()}
+        self.categories = {
+            col: info["categories"]
+            for col, info in self.meta["columns"].items()
+            if info["kind"] == "category"
+        }
+        self.arrays = {
+            col: np.load(os.path.join(store_dir, f"{col}.npy"), mmap_mode="r")
+            for col in self.meta["columns"]
+        }
+
+    @property
+    def column_names(self):
+        return list(self.arrays)
+
+    # ---------------- Filter helpers ----------------
+    def date_bounds(self):
+        ts = self.arrays["created_at"]
+        return (
+            pd.Timestamp(int(ts.min())).date(),
+            pd.Timestamp(int(ts.max())).date(),
+        )
+
+    def options(self, col):
+        return list(self.categories.get(col, []))
+
+    def code_of(self, col, value):
+        try:
+            return self.categories.get(col, []).index(value)
+        except ValueError:
+            return -2  # kisi bhi row ka code -2 nahi hota
+
+    def select(self, date_range=None, device="All", source="All"):
+        """Return the row indices matching the sidebar filters.
+
+        None means "every row", so callers can keep working on the shared
+        mmap arrays without gathering a copy.
+        """
+        mask = None
+
+        if date_range is not None and len(date_range) == 2:
+            ts = self.arrays["created_at"]
+            start = pd.Timestamp(date_range[0]).value
+            end = (pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)).value
+            mask = (ts >= start) & (ts < end)
+            if mask.all():
+                mask = None
+
+        if device != "All":
+            m = self.arrays["device_type"] == self.code_of("device_type", device)
+            mask = m if mask is None else mask & m
+
+        if source != "All":
+            m = self.arrays["utm_source"] == self.code_of("utm_source", source)
+            mask = m if mask is None else mask & m
+
+        if mask is None:
+            return None
+        return np.flatnonzero(mask)
+
+    def _all_rows(self, rows):
+        return np.arange(self.n_rows) if rows is None else rows
+
+    def order_rows(self, rows=None):
+        """Restrict a selection to one row per order (same as orders_of)."""
+        rows = self._all_rows(rows)
+        rows = rows[self.arrays["is_conversion"].take(rows) == 1]
+        _, first = np.unique(self.arrays["order_id"].take(rows), return_index=True)
+        return rows[np.sort(first)]
+
+    # ---------------- Explorer (search / column filters / sort / page) ----------------
+    def search_rows(self, rows, text, columns):
+        """Case-insensitive substring search on categorical columns.
+
+        Only the (few) category strings are scanned; rows are matched by code.
+        """
+        rows = self._all_rows(rows)
+        text = (text or "").strip().lower()
+        if not text:
+            return rows
+        mask = np.zeros(len(rows), dtype=bool)
+        for col in columns:
+            if self.kinds.get(col) != "category":
+                continue  # purane store mein khali text column numeric ho sakta hai
+            hits = [i for i, value in enumerate(self.categories[col]) if text in value.lower()]
+            if hits:
+                mask |= np.isin(self.arrays[col].take(rows), hits)
+        return rows[mask]
+
+    def filter_rows(self, rows, column_filters):
+        """Apply {column: [values]} for categories or {column: (lo, hi)} for numbers."""
+        rows = self._all_rows(rows)
+        for col, wanted in (column_filters or {}).items():
+            if self.kinds[col] == "category":
+                if not wanted:
+                    continue
+                codes = [self.code_of(col, value) for value in wanted]
+                rows = rows[np.isin(self.arrays[col].take(rows), codes)]
+            elif isinstance(wanted, (list, set)):
+                continue  # value list sirf category columns par lagti hai
+            else:
+                lo, hi = wanted
+                values = self.arrays[col].take(rows)
+                rows = rows[(values >= lo) & (values <= hi)]
+        return rows
+
+    def sort_rows(self, rows, sort_by, ascending=True):
+        rows = self._all_rows(rows)
+        values = self.arrays[sort_by].take(rows)
+        if self.kinds[sort_by] == "category":
+            # Codes ko category ke alphabetical rank mein badalte hain; missing (-1) last
+            ranks = np.empty(len(self.categories[sort_by]) + 1, dtype="int64")
+            ranks[np.argsort(self.categories[sort_by], kind="stable")] = np.arange(len(self.categories[sort_by]))
+            ranks[-1] = len(self.categories[sort_by]) if ascending else -1
+            values = ranks[values]
+        # Descending = negated keys, taaki ties ka order aur NaN (last) dono bane rahein
+        order = np.argsort(values if ascending else -values, kind="stable")
+        return rows[order]
+
+    def page(self, rows, page_number, page_size, columns=None):
+        """Materialise a single page of an already filtered/sorted row index."""
+        rows = self._all_rows(rows)
+        start = page_number * page_size
+        return self.frame(rows[start:start + page_size], columns)
+
+    # ---------------- Materialisation ----------------
+    def column(self, col, rows=None):
+        values = self.arrays[col]
+        if rows is not None:
+            values = values.take(rows)
+        kind = self.kinds[col]
+        if kind == "datetime":
+            return values.view("datetime64[ns]")
+        if kind == "category":
+            return pd.Categorical.from_codes(values, self.categories[col])
+        return values
+
+    def frame(self, rows=None, columns=None):
+        """Build a DataFrame for the selected rows.
+
+        Only the selected rows are gathered; with rows=None the frame is built
+        directly on top of the read-only mmap arrays.
+        """
+        columns = columns or self.column_names
+        return pd.DataFrame(
+            {col: self.column(col, rows) for col in columns},
+            copy=False,
+        )
+
+
+def store_dir_for(csv_path):
+    """Store directory next to csv_path; a non-master CSV gets its own directory."""
+    root, name = os.path.split(csv_path)
+    if name == SOURCE_FILE:
+        return os.path.join(root, STORE_DIR)
+    return os.path.join(root, f"{STORE_DIR}_{os.path.splitext(name)[0]}")
+
+
+def open_store(csv_path=SOURCE_FILE, store_dir=None):
+    # Default store dir CSV se: --csv other.csv dashboard ka default store overwrite na kare
+    return DataStore(ensure_store(csv_path, store_dir or store_dir_for(csv_path)))
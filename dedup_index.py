@@ -0,0 +1,333 @@
+import os
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import enrich
+import validation
+
+# ======================================================
+# PERSISTENT SESSION DEDUP INDEX
+# ======================================================
+# website_sessions.drop_duplicates() har run par poore frame ke saare columns
+# hash karta hai, aur naye batch ko purane data se compare nahi kar sakta.
+# Yahan dedup website_session_id par hota hai, ek on-disk index ke saath:
+#
+#   <store root>/.bearcart_dedup/website_sessions.hashes   (uint64 memmap)
+#   <store root>/.bearcart_dedup/website_sessions.dropped.npy
+#   <store root>/.bearcart_dedup/website_sessions.json     (meta, last write)
+#
+# Session ids dense auto-increment integers hain, isliye hashes[id] = us id
+# ki full-row hash (0 = abhi tak nahi dekha). Naya batch sirf apni ids ki
+# slots padhta/likhta hai - kaam batch size jitna, history size jitna nahi.
+# Ids bahut sparse hon to sorted ids.npy + sorted_hashes.npy use hote hain;
+# naye ids ek chhote sorted delta (delta_ids.npy / delta_hashes.npy) mein
+# jaate hain aur DELTA_LIMIT par main arrays mein merge hote hain - har batch
+# sirf delta likhta hai, poori history sirf merge par dobara likhi jati hai.
+# Same id + same hash = duplicate; same id + alag hash = conflict (pehli row
+# rehti hai, conflict report hota hai).
+
+DEDUP_DIR = ".bearcart_dedup"
+SAMPLE_ROWS = 5
+MIN_CAPACITY = 1 << 16
+DELTA_LIMIT = 1 << 18
+
+
+def row_hashes(df, kinds):
+    """Stable uint64 hash per row; columns are normalised so CSV dtype drift doesn't matter."""
+    normalised = {}
+    for col in df.columns:
+        if kinds.get(col, "text") in ("id", "flag", "count", "money"):
+            normalised[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            normalised[col] = df[col].astype(object).where(df[col].notna(), "")
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(normalised), index=False).to_numpy(copy=True)
+    hashes[hashes == 0] = 1  # 0 "unseen" slot ke liye reserved hai
+    return hashes
+
+
+def _ids(series, key):
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore"):
+        valid = (values >= 0) & (values == np.floor(values))
+    if not valid.all():
+        raise ValueError(f"{key} must hold non-negative integer ids ({(~valid).sum():,} invalid rows)")
+    return values.astype("int64")
+
+
+class DedupIndex:
+    def __init__(self, index_dir, name="website_sessions", key="website_session_id", kinds=None):
+        self.index_dir = index_dir
+        self.name = name
+        self.key = key
+        self.kinds = kinds if kinds is not None else validation.SCHEMAS[name]["columns"]
+        self.hash_path = os.path.join(index_dir, f"{name}.hashes")
+        self.ids_path = os.path.join(index_dir, f"{name}.ids.npy")
+        self.sorted_hash_path = os.path.join(index_dir, f"{name}.sorted_hashes.npy")
+        self.delta_ids_path = os.path.join(index_dir, f"{name}.delta_ids.npy")
+        self.delta_hash_path = os.path.join(index_dir, f"{name}.delta_hashes.npy")
+        self.dropped_path = os.path.join(index_dir, f"{name}.dropped.npy")
+        self.meta_path = os.path.join(index_dir, f"{name}.json")
+        self.meta = self._read_meta()
+        self.n_ids = self.meta["n_ids"]
+        self._open()
+
+    # ---------------- Storage ----------------
+    # Do layouts: "dense" (hashes[id], jab ids dense hon) aur "sorted" (sorted
+    # id array + parallel hash array, searchsorted se lookup). Sparse ids par
+    # dense file enrich.MAX_SPARSITY se zyada nahi badhti - sorted par switch.
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": None, "n_ids": 0, "layout": "dense"}
+
+    def _open(self):
+        self.layout = self.meta.get("layout", "dense")
+        self.hashes = np.zeros(0, dtype="uint64")
+        self.sorted_ids = np.zeros(0, dtype="int64")
+        self.sorted_hashes = np.zeros(0, dtype="uint64")
+        self.delta_ids = np.zeros(0, dtype="int64")
+        self.delta_hashes = np.zeros(0, dtype="uint64")
+        self.main_dirty = False
+        if self.layout == "dense":
+            if os.path.exists(self.hash_path) and os.path.getsize(self.hash_path):
+                self.hashes = np.memmap(self.hash_path, dtype="uint64", mode="r+")
+            return
+        # Main arrays mmap se: lookup sirf searchsorted wale pages chhoota hai
+        if os.path.exists(self.ids_path):
+            self.sorted_ids = np.load(self.ids_path, mmap_mode="r")
+            self.sorted_hashes = np.load(self.sorted_hash_path, mmap_mode="r")
+        if os.path.exists(self.delta_ids_path):
+            self.delta_ids = np.load(self.delta_ids_path)
+            self.delta_hashes = np.load(self.delta_hash_path)
+
+    def _reset(self):
+        self.hashes = None
+        # Meta pehle hatao: beech mein crash ho to index "current" na lage
+        for path in (self.meta_path, self.hash_path, self.ids_path, self.sorted_hash_path,
+                     self.delta_ids_path, self.delta_hash_path, self.dropped_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.meta = {"version": None, "n_ids": 0, "layout": "dense"}
+        self.n_ids = 0
+        self._open()
+
+    def _dense_limit(self, n_ids):
+        return enrich.MAX_SPARSITY * n_ids + MIN_CAPACITY
+
+    def _ensure_capacity(self, max_id, n_ids):
+        """Grow the dense file for max_id, or switch to the sorted layout if ids are too sparse."""
+        if self.layout != "dense" or max_id < len(self.hashes):
+            return
+        limit = self._dense_limit(n_ids)
+        if max_id >= limit:
+            self._to_sorted()
+            return
+        # Doubling growth (density limit tak): naye slots zero (unseen) hote hain
+        size = min(max(max_id + 1, 2 * len(self.hashes), MIN_CAPACITY), limit)
+        os.makedirs(self.index_dir, exist_ok=True)
+        if isinstance(self.hashes, np.memmap):
+            self.hashes.flush()
+        self.hashes = None
+        with open(self.hash_path, "ab") as f:
+            f.truncate(size * 8)
+        self.hashes = np.memmap(self.hash_path, dtype="uint64", mode="r+")
+
+    def _to_sorted(self):
+        ids = np.flatnonzero(self.hashes)
+        self.sorted_ids, self.sorted_hashes = ids.astype("int64"), np.array(self.hashes[ids], dtype="uint64")
+        self.hashes = np.zeros(0, dtype="uint64")
+        self.main_dirty = True
+        self.layout = "sorted"  # purani dense file commit ke baad hi hatti hai
+
+    @staticmethod
+    def _search(sorted_ids, sorted_hashes, ids):
+        if not len(sorted_ids):
+            return np.zeros(len(ids), dtype="uint64")
+        positions = np.searchsorted(sorted_ids, ids)
+        clipped = np.minimum(positions, len(sorted_ids) - 1)
+        found = np.asarray(sorted_ids[clipped]) == ids
+        return np.where(found, sorted_hashes[clipped], 0).astype("uint64")
+
+    def _lookup(self, ids):
+        """Stored hash for each id (0 = not seen)."""
+        if self.layout == "dense":
+            return np.array(self.hashes[ids])
+        # Koi id main aur delta dono mein nahi hoti, isliye OR se jod sakte hain
+        return (self._search(self.sorted_ids, self.sorted_hashes, ids)
+                | self._search(self.delta_ids, self.delta_hashes, ids))
+
+    def _store(self, ids, hashes):
+        """Record unseen ids (unique, not yet in the index)."""
+        if self.layout == "dense":
+            self.hashes[ids] = hashes
+        else:
+            order = np.argsort(ids)
+            positions = np.searchsorted(self.delta_ids, ids[order])
+            self.delta_ids = np.insert(self.delta_ids, positions, ids[order])
+            self.delta_hashes = np.insert(self.delta_hashes, positions, hashes[order])
+            if len(self.delta_ids) > DELTA_LIMIT:
+                self._merge_delta()
+        self.n_ids += len(ids)
+
+    def _merge_delta(self):
+        positions = np.searchsorted(self.sorted_ids, self.delta_ids)
+        self.sorted_ids = np.insert(self.sorted_ids, positions, self.delta_ids)
+        self.sorted_hashes = np.insert(self.sorted_hashes, positions, self.delta_hashes)
+        self.delta_ids = np.zeros(0, dtype="int64")
+        self.delta_hashes = np.zeros(0, dtype="uint64")
+        self.main_dirty = True
+
+    def _save_array(self, path, values):
+        tmp = data_store.tmp_path(path)
+        with open(tmp, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp, path)
+
+    def _write_meta(self, meta):
+        tmp_meta = data_store.tmp_path(self.meta_path)
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.meta_path)
+        self.meta = meta
+
+    def _mark_stale(self):
+        """Drop the stored version before index writes that run ahead of the history file."""
+        if self.meta.get("version") is not None:
+            self._write_meta(dict(self.meta, version=None))
+
+    def _commit(self, version, history):
+        os.makedirs(self.index_dir, exist_ok=True)
+        if self.layout == "dense":
+            if isinstance(self.hashes, np.memmap):
+                self.hashes.flush()
+        else:
+            if self.main_dirty:
+                self._save_array(self.ids_path, self.sorted_ids)
+                self._save_array(self.sorted_hash_path, self.sorted_hashes)
+                self.main_dirty = False
+            self._save_array(self.delta_ids_path, self.delta_ids)
+            self._save_array(self.delta_hash_path, self.delta_hashes)
+        self._write_meta({"version": version, "n_ids": int(self.n_ids), "key": self.key, "layout": self.layout,
+                          "history": history, "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")})
+        if self.layout == "sorted" and os.path.exists(self.hash_path):
+            os.remove(self.hash_path)
+
+    def is_current(self, source_path):
+        """True when the index was built from exactly this version of the history file."""
+        return self.meta.get("version") is not None and self.meta["version"] == data_store.source_version(source_path)
+
+    # ---------------- Dedup ----------------
+    def add(self, batch):
+        """Dedup a batch against itself and the index, record its new ids.
+
+        Returns (positions of rows to keep, stats). Cost depends only on the
+        batch: one sort of its ids plus reads/writes of their hash slots.
+        """
+        ids = _ids(batch[self.key], self.key)
+        hashes = row_hashes(batch, self.kinds)
+
+        # Batch ke andar: har id ki pehli row, baaki exact copy ya conflict
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        first_hash = hashes[order][first][np.cumsum(first) - 1]
+        repeat = ~first
+        batch_conflict = np.zeros(len(ids), dtype=bool)
+        batch_conflict[order] = repeat & (hashes[order] != first_hash)
+
+        # History ke against: sirf is batch ki ids ke slots
+        candidates = np.sort(order[first])
+        if len(ids):
+            self._ensure_capacity(int(ids.max()), self.n_ids + len(candidates))
+        stored = self._lookup(ids[candidates])
+        new = stored == 0
+        history_conflict = np.zeros(len(ids), dtype=bool)
+        history_conflict[candidates] = ~new & (stored != hashes[candidates])
+
+        keep = candidates[new]
+        self._store(ids[keep], hashes[keep])
+
+        conflicts = np.flatnonzero(batch_conflict | history_conflict)
+        stats = {
+            "rows": len(ids),
+            "new": len(keep),
+            "duplicates": len(ids) - len(keep) - len(conflicts),
+            "conflicts": len(conflicts),
+            "conflict_sample": batch.iloc[conflicts[:SAMPLE_ROWS]].to_dict("records"),
+        }
+        return keep, stats
+
+    def rebuild(self, history, source_path):
+        """Index the full history file from scratch (first run, or the file changed)."""
+        self._reset()
+        keep, stats = self.add(history)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._save_array(self.dropped_path, np.setdiff1d(np.arange(len(history)), keep))
+        history_stats = {k: stats[k] for k in ("rows", "new", "duplicates", "conflicts")}
+        self._commit(data_store.source_version(source_path), history_stats)
+        return stats
+
+    def history_rows(self, history, source_path):
+        """Deduplicated history frame; reuses the stored drop list when the file is unchanged."""
+        if self.is_current(source_path) and os.path.exists(self.dropped_path):
+            dropped = np.load(self.dropped_path)
+            stats = dict(self.meta["history"], rows=len(history), new=len(history) - len(dropped), rebuilt=False)
+        else:
+            stats = self.rebuild(history, source_path)
+            stats["rebuilt"] = True
+            dropped = np.load(self.dropped_path)
+        keep = np.ones(len(history), dtype=bool)
+        keep[dropped] = False
+        return history[keep], stats
+
+    def append_batch(self, batch_path, source_path):
+        """Append only the unseen sessions of a new CSV batch to the history file.
+
+        If the history file does not exist yet, the first batch creates it.
+        """
+        if not os.path.exists(source_path):
+            return self._start_history(batch_path, source_path)
+        if not self.is_current(source_path):
+            self.rebuild(pd.read_csv(source_path), source_path)
+        # History file ke column order mein, taaki append aur row hash dono match karein
+        batch = pd.read_csv(batch_path)[pd.read_csv(source_path, nrows=0).columns]
+        # add() hashes ko turant (shared memmap mein) likhta hai; CSV append fail
+        # ho to purana version match karke naye rows "already seen" lagte -
+        # isliye pehle index stale mark karo, agla run rebuild karega
+        self._mark_stale()
+        keep, stats = self.add(batch)
+
+        with open(source_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        batch.iloc[keep].to_csv(source_path, mode="a", header=False, index=False)
+        # CSV append + hashes ke baad hi naya version likhte hain
+        history = dict(self.meta["history"])
+        history["rows"] += len(keep)
+        history["new"] += len(keep)
+        self._commit(data_store.source_version(source_path), history)
+        return stats
+
+    def _start_history(self, batch_path, source_path):
+        batch = pd.read_csv(batch_path)
+        self._reset()
+        keep, stats = self.add(batch)
+        # Pehle tmp file, phir replace: adhoori history file kabhi na dikhe
+        tmp_history = data_store.tmp_path(source_path)
+        batch.iloc[keep].to_csv(tmp_history, index=False)
+        os.replace(tmp_history, source_path)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._save_array(self.dropped_path, np.zeros(0, dtype="int64"))
+        history = {"rows": len(keep), "new": len(keep), "duplicates": 0, "conflicts": 0}
+        self._commit(data_store.source_version(source_path), history)
+        return stats
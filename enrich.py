@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# JOIN-FREE ENRICHMENT
+# ======================================================
+# website_session_id, order_id aur product_id sab dense integers hain, isliye
+# hash join (pd.merge / dict map) ki jagah seedha "id -> row position" array
+# banate hain aur columns ko NumPy take se utha lete hain.
+# Agar ids dense/unique na hon to purane merge path par wapas chale jate hain.
+
+# Is se zyada sparse ids (max_id / rows) par lookup array banana mehnga hai
+MAX_SPARSITY = 8
+
+ORDER_COLUMNS = ["website_session_id", "order_id", "price_usd", "cogs_usd", "refund_amount_usd",
+                 "is_refunded", "items_purchased", "primary_product_id"]
+PRODUCT_COLUMNS = ["product_id", "product_name"]
+
+
+def _as_ids(keys):
+    """Return keys as int64 ids plus a mask of the ones that are valid ids."""
+    values = pd.to_numeric(pd.Series(keys), errors="coerce").to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore"):
+        valid = (values >= 0) & (values == np.floor(values))
+    ids = np.where(valid, values, -1).astype("int64")
+    return ids, valid
+
+
+def dense_index(keys):
+    """Build a position array where index[id] is the row holding that id (-1 = none).
+
+    Returns None when the keys are not unique, non-negative, reasonably dense
+    integers, so callers can fall back to a hash join.
+    """
+    ids, valid = _as_ids(keys)
+    if not valid.all():
+        return None
+    size = int(ids.max()) + 1 if len(ids) else 0
+    if size > MAX_SPARSITY * len(ids) + 1024:
+        return None
+    index = np.full(size, -1, dtype="int64")
+    index[ids] = np.arange(len(ids))
+    if (index >= 0).sum() != len(ids):
+        return None  # duplicate ids
+    return index
+
+
+def lookup(index, keys):
+    """Row positions for keys in a dense index; -1 for missing / out-of-range keys."""
+    ids, valid = _as_ids(keys)
+    in_range = valid & (ids < len(index))
+    positions = np.full(len(ids), -1, dtype="int64")
+    positions[in_range] = index[ids[in_range]]
+    return positions
+
+
+def gather(series, positions):
+    """series.take(positions) with NaN wherever position is -1 (like a left join)."""
+    values = series.to_numpy()
+    if values.dtype.kind in "iub":
+        values = values.astype("float64")  # merge bhi missing rows ke liye float banata hai
+    if values.dtype.kind in "fmM":
+        sentinel = np.array(["NaN" if values.dtype.kind == "f" else "NaT"], dtype=values.dtype)
+    else:
+        values = values.astype(object)
+        sentinel = np.array([np.nan], dtype=object)
+    # Position -1 apne aap last element (missing sentinel) uthata hai
+    return np.concatenate([values, sentinel])[positions]
+
+
+# ---------------- Enrichment steps ----------------
+def fill_user_ids(orders, sessions):
+    """Fill missing orders.user_id from the session table (replaces the dict map)."""
+    index = dense_index(sessions["website_session_id"])
+    if index is None:
+        # Duplicate session ids: dict jaisa "last wins" behaviour
+        session_user_map = sessions.drop_duplicates("website_session_id", keep="last")
+        session_user_map = session_user_map.set_index("website_session_id")["user_id"]
+        return orders["user_id"].fillna(orders["website_session_id"].map(session_user_map))
+    positions = lookup(index, orders["website_session_id"])
+    mapped = pd.Series(gather(sessions["user_id"], positions), index=orders.index)
+    return orders["user_id"].fillna(mapped)
+
+
+def attach_refunds(orders, refunds_grouped):
+    """Add refund_amount_usd (0 when none) and is_refunded to orders."""
+    orders = orders.copy()
+    index = dense_index(refunds_grouped["order_id"])
+    if index is None:
+        orders = pd.merge(orders, refunds_grouped, on="order_id", how="left")
+    else:
+        positions = lookup(index, orders["order_id"])
+        orders["refund_amount_usd"] = gather(refunds_grouped["refund_amount_usd"], positions)
+    orders["refund_amount_usd"] = orders["refund_amount_usd"].fillna(0)
+    orders["is_refunded"] = np.where(orders["refund_amount_usd"] > 0, 1, 0)
+    return orders
+
+
+def build_master_merge(sessions, orders, products):
+    """Reference hash-join path (sessions -> orders -> products)."""
+    master_df = pd.merge(
+        sessions,
+        orders[ORDER_COLUMNS],
+        on="website_session_id",
+        how="left"
+    )
+    return pd.merge(
+        master_df,
+        products[PRODUCT_COLUMNS],
+        left_on="primary_product_id",
+        right_on="product_id",
+        how="left"
+    )
+
+
+def build_master(sessions, orders, products):
+    """Sessions left-joined with orders and products using dense lookup arrays."""
+    order_index = dense_index(orders["website_session_id"])
+    product_index = dense_index(products["product_id"])
+    if order_index is None or product_index is None:
+        # Ek session par multiple orders (ya ajeeb ids) - merge hi sahi hai
+        return build_master_merge(sessions, orders, products)
+
+    columns = {col: sessions[col].to_numpy() for col in sessions.columns}
+
+    order_pos = lookup(order_index, sessions["website_session_id"])
+    for col in ORDER_COLUMNS[1:]:
+        columns[col] = gather(orders[col], order_pos)
+
+    product_pos = lookup(product_index, columns["primary_product_id"])
+    for col in PRODUCT_COLUMNS:
+        columns[col] = gather(products[col], product_pos)
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(sessions)), copy=False)
@@ -0,0 +1,162 @@
+import os
+import weakref
+import tempfile
+import functools
+import numpy as np
+
+# ======================================================
+# STREAMING EXPORT
+# ======================================================
+# Filtered selection ko chunks mein CSV/Parquet bytes bana kar yield karte
+# hain. Ek waqt par sirf ek chunk memory mein hota hai, selection kitna bhi
+# bada ho. Rows wahi hain jo charts use karte hain (store.select /
+# store.order_rows).
+
+CHUNK_ROWS = 50_000
+FORMATS = {"csv": ("text/csv", ".csv"), "parquet": ("application/vnd.apache.parquet", ".parquet")}
+
+
+def export_rows(store, date_range, device, source, level="sessions"):
+    rows = store.select(date_range, device, source)
+    if level == "orders":
+        return store.order_rows(rows)
+    return rows
+
+
+def iter_chunks(store, rows, columns=None, chunk_size=CHUNK_ROWS):
+    if rows is None:
+        # Poora dataset: mmap par bane frame se slices, koi full copy nahi
+        full = store.frame(None, columns)
+        for start in range(0, store.n_rows, chunk_size):
+            yield full.iloc[start:start + chunk_size]
+        return
+    for start in range(0, len(rows), chunk_size):
+        yield store.frame(rows[start:start + chunk_size], columns)
+
+
+def _iter_csv(store, rows, columns, chunk_size):
+    header = True
+    for chunk in iter_chunks(store, rows, columns, chunk_size):
+        yield chunk.to_csv(index=False, header=header).encode()
+        header = False
+    if header:
+        # Khaali selection - kam se kam header to ho
+        yield (",".join(columns or store.column_names) + "\n").encode()
+
+
+class _ChunkSink:
+    """Minimal writable file object that hands back bytes as they are written."""
+
+    def __init__(self):
+        self.buffers = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffers.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.buffers)
+        self.buffers = []
+        return data
+
+
+def _iter_parquet(store, rows, columns, chunk_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow. Install it with: pip install pyarrow")
+
+    sink = _ChunkSink()
+    writer = None
+    for chunk in iter_chunks(store, rows, columns, chunk_size):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        # Har chunk ek row group hai; likhte hi bytes aage bhej dete hain
+        writer.write_table(table.cast(writer.schema))
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is None:
+        empty = store.frame(np.arange(0), columns)
+        writer = pq.ParquetWriter(sink, pa.Table.from_pandas(empty, preserve_index=False).schema)
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(store, rows, fmt="csv", columns=None, chunk_size=CHUNK_ROWS):
+    """Yield the encoded export of the selected rows, one chunk at a time."""
+    if fmt == "csv":
+        return _iter_csv(store, rows, columns, chunk_size)
+    if fmt == "parquet":
+        return _iter_parquet(store, rows, columns, chunk_size)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_to_file(store, rows, fmt="csv", columns=None, chunk_size=CHUNK_ROWS, directory=None):
+    """Stream the export into a temporary file and return its path."""
+    suffix = FORMATS[fmt][1]
+    fd, path = tempfile.mkstemp(prefix="bearcart_export_", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for data in iter_export(store, rows, fmt, columns, chunk_size):
+                f.write(data)
+    except BaseException:
+        # Adhoori file (jaise pyarrow missing par RuntimeError) peeche na chhute
+        _remove_quietly(path)
+        raise
+    return path
+
+
+def export_file_name(store_name, date_range, device, source, level, fmt):
+    """Download name that spells out the selection it was built from."""
+    dates = "_".join(str(d) for d in date_range) or "all"
+    parts = [store_name, level, dates, device, source]
+    return "_".join(str(p).replace(" ", "-").replace("/", "-") for p in parts) + FORMATS[fmt][1]
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class ExportFile:
+    """A prepared export on disk, tied to the selection it was built from.
+
+    The file is deleted on discard(), or when the object is garbage collected
+    (e.g. the dashboard session holding it ends) or the process exits.
+    """
+
+    def __init__(self, path, selection, name, mime):
+        self.path = path
+        self.selection = selection
+        self.name = name
+        self.mime = mime
+        self._finalizer = weakref.finalize(self, _remove_quietly, path)
+
+    def reader(self):
+        # Download button ko callable: file sirf click par padhi jati hai, har rerun par nahi
+        return functools.partial(_read_file, self.path)
+
+    def discard(self):
+        self._finalizer()
@@ -0,0 +1,278 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# KPI ENGINE
+# ======================================================
+# Dashboard ke saare KPI aur chart aggregations yahan hain, taaki dashboard,
+# HTTP service aur batch reports ek hi numbers use karein.
+
+DAY_NS = 24 * 60 * 60 * 10**9
+
+
+# ---------------- Row level (exact, same as the charts) ----------------
+def orders_of(filtered_df):
+    return filtered_df[filtered_df["is_conversion"] == 1].drop_duplicates(subset="order_id")
+
+
+def kpis_from_totals(revenue, profit, orders, traffic, items, refunds):
+    """KPI dict from summed totals - row level, cube, and cross-store paths all end here."""
+    return {
+        "total_revenue": float(revenue),
+        "total_profit": float(profit),
+        "total_orders": int(orders),
+        "aov": float(revenue / orders) if orders > 0 else 0.0,
+        "total_traffic": int(traffic),
+        "conversion_rate": float(orders / traffic * 100) if traffic > 0 else 0.0,
+        "items_sold": int(items),
+        "total_refunds": float(refunds),
+    }
+
+
+def compute_kpis(filtered_df, orders_df):
+    def order_sum(col):
+        return orders_df[col].sum() if col in orders_df.columns else 0
+
+    return kpis_from_totals(
+        revenue=orders_df["price_usd"].sum(),
+        profit=order_sum("adjusted_net_profit"),
+        orders=orders_df["order_id"].nunique(),
+        traffic=filtered_df["website_session_id"].nunique(),
+        items=order_sum("items_purchased"),
+        refunds=order_sum("refund_amount_usd"),
+    )
+
+
+def _monthly(orders_df, col, how):
+    grouped = orders_df.groupby(orders_df["created_at"].dt.to_period("M"))[col]
+    result = getattr(grouped, how)().reset_index()
+    result["created_at"] = result["created_at"].astype(str)
+    return result
+
+
+def monthly_sales(orders_df):
+    return _monthly(orders_df, "price_usd", "sum")
+
+
+def monthly_orders(orders_df):
+    return _monthly(orders_df, "order_id", "nunique")
+
+
+def monthly_refunds(orders_df):
+    return _monthly(orders_df, "refund_amount_usd", "sum")
+
+
+def channel_revenue(orders_df):
+    result = orders_df.groupby("utm_source", observed=True)["price_usd"].sum().reset_index()
+    return result.sort_values("price_usd", ascending=True)
+
+
+def device_stats(filtered_df):
+    result = filtered_df.groupby("device_type", observed=True).agg({
+        "is_conversion": ["sum", "count"]
+    }).reset_index()
+    result.columns = ["device_type", "conversions", "sessions"]
+    result["conversion_rate"] = (result["conversions"] / result["sessions"] * 100)
+    return result
+
+
+def product_sales(orders_df, top=10):
+    result = orders_df.groupby("product_name", observed=True).agg({
+        "items_purchased": "sum",
+        "price_usd": "sum"
+    }).reset_index()
+    result = result.sort_values("price_usd", ascending=True)
+    return result if top is None else result.tail(top)
+
+
+def all_product_sales(orders_df):
+    # View mein saare products rakhte hain, taaki cross-store top 10 sahi bane
+    return product_sales(orders_df, top=None)
+
+
+def source_analysis(filtered_df):
+    result = filtered_df.groupby("utm_source", observed=True).agg({
+        "website_session_id": "nunique",
+        "is_conversion": "sum"
+    }).reset_index()
+    result.columns = ["utm_source", "sessions", "conversions"]
+    result["conversion_rate"] = (result["conversions"] / result["sessions"] * 100)
+    return result.sort_values("sessions", ascending=False)
+
+
+CHARTS = {
+    "monthly_sales": (monthly_sales, "orders"),
+    "channel_revenue": (channel_revenue, "orders"),
+    "monthly_orders": (monthly_orders, "orders"),
+    "monthly_refunds": (monthly_refunds, "orders"),
+    "device_stats": (device_stats, "sessions"),
+    "product_sales": (all_product_sales, "orders"),
+    "source_analysis": (source_analysis, "sessions"),
+}
+
+
+def compute_view(filtered_df):
+    """KPIs plus every chart aggregate for one filter selection."""
+    orders_df = orders_of(filtered_df)
+    view = {"kpis": compute_kpis(filtered_df, orders_df)}
+    for name, (func, level) in CHARTS.items():
+        view[name] = func(orders_df if level == "orders" else filtered_df)
+    return view
+
+
+def view_to_json(view):
+    out = {}
+    for key, value in view.items():
+        if isinstance(value, pd.DataFrame):
+            out[key] = value.astype(object).where(value.notna(), None).to_dict(orient="list")
+        else:
+            out[key] = value
+    return out
+
+
+def view_from_json(data):
+    view = {}
+    for key, value in data.items():
+        view[key] = value if key == "kpis" else pd.DataFrame(value)
+    return view
+
+
+# ---------------- Cross-store rollups ----------------
+def combine_kpis(kpi_list):
+    """Roll up per-store KPIs: add the totals, then recompute the ratios."""
+    def total(key):
+        return sum(kpis[key] for kpis in kpi_list)
+
+    return kpis_from_totals(total("total_revenue"), total("total_profit"), total("total_orders"),
+                            total("total_traffic"), total("items_sold"), total("total_refunds"))
+
+
+def _sum_by(frames, key, value_cols):
+    combined = pd.concat([frame[[key] + value_cols] for frame in frames], ignore_index=True)
+    combined[key] = combined[key].astype(object)
+    return combined.groupby(key, sort=False)[value_cols].sum().reset_index()
+
+
+def combine_views(views):
+    """Cross-store view built only from per-store aggregates (no raw rows)."""
+    if len(views) == 1:
+        return views[0]
+
+    view = {"kpis": combine_kpis([v["kpis"] for v in views])}
+    for name, col in [("monthly_sales", "price_usd"), ("monthly_orders", "order_id"),
+                      ("monthly_refunds", "refund_amount_usd")]:
+        # Order ids har store mein alag hain, isliye per-store counts add karna sahi hai
+        view[name] = _sum_by([v[name] for v in views], "created_at", [col]).sort_values("created_at")
+
+    view["channel_revenue"] = _sum_by([v["channel_revenue"] for v in views], "utm_source", ["price_usd"]) \
+        .sort_values("price_usd", ascending=True)
+
+    for name, key in [("device_stats", "device_type"), ("source_analysis", "utm_source")]:
+        result = _sum_by([v[name] for v in views], key, ["conversions", "sessions"])
+        result["conversion_rate"] = result["conversions"] / result["sessions"] * 100
+        view[name] = result[[key, "sessions", "conversions", "conversion_rate"]] if name == "source_analysis" \
+            else result[[key, "conversions", "sessions", "conversion_rate"]]
+    view["source_analysis"] = view["source_analysis"].sort_values("sessions", ascending=False)
+
+    view["product_sales"] = _sum_by([v["product_sales"] for v in views], "product_name",
+                                    ["items_purchased", "price_usd"]).sort_values("price_usd", ascending=True)
+    return view
+
+
+# ---------------- Batch mode (one pass over the data) ----------------
+def counted_rows(store):
+    """Boolean masks of the rows compute_kpis counts: (first row per session, first converting row per order).
+
+    Merge fallback wale master mein ek session ki kai rows ho sakti hain.
+    Session/order ke saare rows ka date, device aur source same hota hai, isliye
+    global "pehli row" har filter ke andar bhi wahi hai - in masks par sum
+    nunique sessions aur orders_of() jaisa hi deta hai.
+    """
+    arrays = store.arrays
+    sessions = np.zeros(store.n_rows, dtype=bool)
+    sessions[np.unique(arrays["website_session_id"], return_index=True)[1]] = True
+    orders = np.zeros(store.n_rows, dtype=bool)
+    converting = np.flatnonzero(arrays["is_conversion"] == 1)
+    orders[converting[np.unique(arrays["order_id"].take(converting), return_index=True)[1]]] = True
+    return sessions, orders
+
+
+def daily_cube(store):
+    """Aggregate the whole store once by (day, device, source).
+
+    Every KPI is a sum over counted_rows(), so any date range / device /
+    source combination can then be answered from this small cube.
+    """
+    arrays = store.arrays
+    sessions, orders = counted_rows(store)
+
+    def order_values(col):
+        if col not in arrays:
+            return np.zeros(store.n_rows)
+        return np.where(orders, np.nan_to_num(arrays[col]), 0.0)
+
+    cube = pd.DataFrame({
+        "day": arrays["created_at"] // DAY_NS,
+        "device_code": arrays["device_type"],
+        "source_code": arrays["utm_source"],
+        "sessions": sessions.astype("int64"),
+        "orders": orders.astype("int64"),
+        "revenue": order_values("price_usd"),
+        "profit": order_values("adjusted_net_profit"),
+        "items": order_values("items_purchased"),
+        "refunds": order_values("refund_amount_usd"),
+    })
+    return cube.groupby(["day", "device_code", "source_code"], sort=True).sum().reset_index()
+
+
+def kpis_from_cube(store, cube, date_range=None, device="All", source="All"):
+    mask = np.ones(len(cube), dtype=bool)
+    if date_range is not None and len(date_range) == 2:
+        start = pd.Timestamp(date_range[0]).value // DAY_NS
+        end = pd.Timestamp(date_range[1]).value // DAY_NS
+        mask &= (cube["day"].to_numpy() >= start) & (cube["day"].to_numpy() <= end)
+    if device != "All":
+        mask &= cube["device_code"].to_numpy() == store.code_of("device_type", device)
+    if source != "All":
+        mask &= cube["source_code"].to_numpy() == store.code_of("utm_source", source)
+
+    totals = cube.loc[mask, ["sessions", "orders", "revenue", "profit", "items", "refunds"]].sum()
+    return kpis_from_totals(totals["revenue"], totals["profit"], totals["orders"],
+                            totals["sessions"], totals["items"], totals["refunds"])
+
+
+def standard_ranges(store, windows=(30, 90, 365)):
+    """Named date ranges ending at the last day in the data, plus full history."""
+    min_date, max_date = store.date_bounds()
+    ranges = {"full": (min_date, max_date)}
+    for days in windows:
+        start = max(min_date, max_date - datetime.timedelta(days=days - 1))
+        ranges[f"last_{days}d"] = (start, max_date)
+    return ranges
+
+
+def filter_combinations(store, ranges):
+    devices = ["All"] + store.options("device_type")
+    sources = ["All"] + store.options("utm_source")
+    for range_name, date_range in ranges.items():
+        for device in devices:
+            for source in sources:
+                yield range_name, date_range, device, source
+
+
+def batch_kpis(store, combos):
+    """KPIs for many (range_name, date_range, device, source) combos in one pass."""
+    cube = daily_cube(store)
+    rows = []
+    for range_name, date_range, device, source in combos:
+        kpis = kpis_from_cube(store, cube, date_range, device, source)
+        rows.append({
+            "range": range_name,
+            "start": str(date_range[0]),
+            "end": str(date_range[1]),
+            "device_type": device,
+            "utm_source": source,
+            **kpis,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,249 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+from urllib.parse import urlsplit, parse_qs
+
+import data_store
+import kpi_engine
+import stores
+import export
+
+# ======================================================
+# HEADLESS KPI SERVICE + BATCH REPORTS
+# ======================================================
+# Dashboard wale hi numbers bina UI ke:
+#
+#   python kpi_service.py serve --port 8765
+#       GET /health
+#       GET /kpis?start=2014-01-01&end=2014-12-31&device=mobile&source=gsearch
+#       GET /view?...   (KPIs + saare chart aggregates)
+#       GET /export?...&level=orders&format=csv   (chunked streaming download)
+#
+#   python kpi_service.py batch --out weekly_report.csv
+#       Har range x device x source combination ke KPIs, data par ek hi pass.
+
+
+class BadRequest(Exception):
+    pass
+
+
+class StreamAborted(Exception):
+    """Export failed after the 200 header went out; only closing the connection is left."""
+
+
+def parse_filters(params, store):
+    min_date, max_date = store.date_bounds()
+    try:
+        start = datetime.date.fromisoformat(params.get("start", [str(min_date)])[0])
+        end = datetime.date.fromisoformat(params.get("end", [str(max_date)])[0])
+    except ValueError as e:
+        raise BadRequest(f"Invalid date: {e}")
+    device = params.get("device", ["All"])[0]
+    source = params.get("source", ["All"])[0]
+    return (start, end), device, source
+
+
+class KPIService:
+    def __init__(self, store):
+        self.store = store
+        # Cube ek baar banta hai; /kpis requests isi se answer hoti hain
+        self.cube = kpi_engine.daily_cube(store)
+
+    def kpis(self, params):
+        date_range, device, source = parse_filters(params, self.store)
+        return {
+            "filters": {"start": str(date_range[0]), "end": str(date_range[1]),
+                        "device": device, "source": source},
+            "kpis": kpi_engine.kpis_from_cube(self.store, self.cube, date_range, device, source),
+        }
+
+    def view(self, params):
+        date_range, device, source = parse_filters(params, self.store)
+        filtered_df = self.store.frame(self.store.select(date_range, device, source))
+        return kpi_engine.view_to_json(kpi_engine.compute_view(filtered_df))
+
+    async def stream_export(self, writer, params, keep_alive):
+        date_range, device, source = parse_filters(params, self.store)
+        level = params.get("level", ["sessions"])[0]
+        fmt = params.get("format", ["csv"])[0]
+        if level not in ("sessions", "orders") or fmt not in export.FORMATS:
+            raise BadRequest("level must be sessions/orders and format csv/parquet")
+
+        rows = await asyncio.to_thread(export.export_rows, self.store, date_range, device, source, level)
+        chunks = export.iter_export(self.store, rows, fmt)
+        # Pehla chunk header se pehle: shuru ki galti (jaise pyarrow missing) abhi
+        # normal error response ban sakti hai, adhoora 200 nahi
+        first = await asyncio.to_thread(next, chunks, None)
+        content_type, suffix = export.FORMATS[fmt]
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Disposition: attachment; filename=bearcart_{level}{suffix}\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1"))
+        # Har chunk thread mein banta hai aur turant socket par jata hai
+        data = first
+        while data is not None:
+            writer.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+            try:
+                data = await asyncio.to_thread(next, chunks, None)
+            except Exception as e:
+                # Terminating chunk ke bina connection band: client ko truncation dikhta hai
+                raise StreamAborted(repr(e)) from e
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def dispatch(self, path, params):
+        if path == "/health":
+            return 200, {"status": "ok", "dataset_version": self.store.version}
+        if path == "/kpis":
+            return 200, self.kpis(params)
+        if path == "/view":
+            # Row-level aggregation CPU heavy hai, event loop block na ho
+            return 200, await asyncio.to_thread(self.view, params)
+        return 404, {"error": f"Unknown path: {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+
+                url = urlsplit(target)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if method != "GET":
+                    status, body = 405, {"error": "Only GET is supported"}
+                else:
+                    try:
+                        if url.path == "/export":
+                            await self.stream_export(writer, parse_qs(url.query), keep_alive)
+                            if not keep_alive:
+                                break
+                            continue
+                        status, body = await self.dispatch(url.path, parse_qs(url.query))
+                    except BadRequest as e:
+                        status, body = 400, {"error": str(e)}
+                    except StreamAborted as e:
+                        print(f"Export aborted mid-stream: {e}", file=sys.stderr)
+                        break
+                    except ConnectionError:
+                        raise
+                    except Exception as e:
+                        print(f"Error handling {url.path}: {e!r}", file=sys.stderr)
+                        status, body = 500, {"error": f"Internal error: {e}"}
+
+                await self.respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, keep_alive):
+        payload = json.dumps(body).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+              500: "Internal Server Error"}[status]
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"KPI service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def open_store(args):
+    if args.store:
+        store_paths = stores.paths(args.store)
+        return data_store.open_store(store_paths.csv, store_paths.store_dir)
+    return data_store.open_store(args.csv)
+
+
+def serve_command(args):
+    store = open_store(args)
+    service = KPIService(store)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+def batch_command(args):
+    store = open_store(args)
+    ranges = kpi_engine.standard_ranges(store)
+    if args.ranges:
+        ranges = {name: ranges[name] for name in args.ranges.split(",")}
+
+    combos = list(kpi_engine.filter_combinations(store, ranges))
+    if args.combos:
+        # JSON list: [{"start": "...", "end": "...", "device": "...", "source": "..."}, ...]
+        with open(args.combos) as f:
+            combos = [
+                (
+                    item.get("name", "custom"),
+                    (datetime.date.fromisoformat(item["start"]), datetime.date.fromisoformat(item["end"])),
+                    item.get("device", "All"),
+                    item.get("source", "All"),
+                )
+                for item in json.load(f)
+            ]
+
+    start = time.perf_counter()
+    report = kpi_engine.batch_kpis(store, combos)
+    elapsed = time.perf_counter() - start
+
+    report.to_csv(args.out, index=False)
+    print(f"{len(report)} filter combinations computed in {elapsed:.2f}s -> {args.out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BearCart headless KPI service")
+    parser.add_argument("--csv", default=data_store.SOURCE_FILE)
+    parser.add_argument("--store", help="store partition name (overrides --csv)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Run the async HTTP/JSON endpoint")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.set_defaults(func=serve_command)
+
+    p = sub.add_parser("batch", help="Compute KPIs for many filter combinations")
+    p.add_argument("--out", default="BearCart_KPI_Report.csv")
+    p.add_argument("--ranges", help="Comma separated: full,last_30d,last_90d,last_365d")
+    p.add_argument("--combos", help="JSON file with explicit filter combinations")
+    p.set_defaults(func=batch_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
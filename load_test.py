@@ -0,0 +1,179 @@
+import sys
+import pickle
+import argparse
+import threading
+import time
+import asyncio
+import statistics
+from urllib.parse import quote
+import pandas as pd
+
+import data_store
+import kpi_engine
+
+# ======================================================
+# CONCURRENT SESSIONS LOAD TEST
+# ======================================================
+# Har "session" ek thread hai jo dashboard ka filter + KPI path chalata hai.
+# Saare threads apna result ek saath hold karte hain (Barrier), tab RSS
+# measure karte hain - bilkul jaise N users ek saath rerun kar rahe hon.
+#
+#   python load_test.py sessions --max-sessions 32
+#
+# "copy" mode purana path hai (st.cache_data jaisa pickled copy + df.copy()),
+# "shared" mode naya memory-mapped store hai.
+#
+#   python load_test.py service --concurrency 50 --requests 2000
+#
+# Chalti hui kpi_service.py par concurrent clients se latency/throughput.
+
+
+def current_rss_mb():
+    # Linux par /proc se resident set size padhte hain
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * (4096 / 1024 / 1024)
+
+
+def _kpis(filtered_df):
+    return kpi_engine.compute_kpis(filtered_df, kpi_engine.orders_of(filtered_df))
+
+
+def run_sessions(mode, n_sessions, store, master_pickle, filters):
+    barrier = threading.Barrier(n_sessions + 1)
+    release = threading.Event()
+
+    def session(i):
+        date_range, device, source = filters[i % len(filters)]
+        if mode == "copy":
+            # st.cache_data har rerun par pickled copy deta hai, phir df.copy()
+            df = pickle.loads(master_pickle)
+            filtered_df = df.copy()
+            filtered_df = filtered_df[
+                (filtered_df["created_at"].dt.date >= date_range[0])
+                & (filtered_df["created_at"].dt.date <= date_range[1])
+            ]
+            if device != "All":
+                filtered_df = filtered_df[filtered_df["device_type"] == device]
+            if source != "All":
+                filtered_df = filtered_df[filtered_df["utm_source"] == source]
+            held = (df, filtered_df)
+        else:
+            filtered_df = store.frame(store.select(date_range, device, source))
+            held = (filtered_df,)
+        _kpis(filtered_df)
+        barrier.wait()
+        release.wait()
+        del held
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    rss = current_rss_mb()
+    release.set()
+    for t in threads:
+        t.join()
+    return rss
+
+
+def sessions_test(args):
+    store = data_store.open_store(args.csv)
+    min_date, max_date = store.date_bounds()
+
+    # Default view + har device/source combination, sessions mein round-robin
+    filters = [((min_date, max_date), "All", "All")]
+    for device in store.options("device_type"):
+        for source in store.options("utm_source"):
+            filters.append(((min_date, max_date), device, source))
+
+    master_pickle = None
+    if args.mode in ("copy", "both"):
+        master = pd.read_csv(args.csv)
+        master["created_at"] = pd.to_datetime(master["created_at"])
+        master_pickle = pickle.dumps(master)
+        del master
+
+    modes = ["shared", "copy"] if args.mode == "both" else [args.mode]
+    levels = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= args.max_sessions]
+
+    print(f"{'mode':<8}{'sessions':>10}{'rss_mb':>12}")
+    for mode in modes:
+        for n in levels:
+            rss = run_sessions(mode, n, store, master_pickle, filters)
+            print(f"{mode:<8}{n:>10}{rss:>12.1f}")
+
+
+async def _client(host, port, paths, results):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            results.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run_service_test(args, paths):
+    results = []
+    per_client = [paths[i::args.concurrency] for i in range(args.concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(args.host, args.port, chunk, results) for chunk in per_client if chunk
+    ))
+    return results, time.perf_counter() - start
+
+
+def service_test(args):
+    store = data_store.open_store(args.csv)
+    ranges = kpi_engine.standard_ranges(store)
+    endpoints = []
+    for range_name, date_range, device, source in kpi_engine.filter_combinations(store, ranges):
+        query = f"start={date_range[0]}&end={date_range[1]}&device={quote(device)}&source={quote(source)}"
+        endpoints.append(f"/{args.endpoint}?{query}")
+    paths = [endpoints[i % len(endpoints)] for i in range(args.requests)]
+
+    latencies, elapsed = asyncio.run(_run_service_test(args, paths))
+    latencies_ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    print(f"Requests: {len(latencies_ms)}  Concurrency: {args.concurrency}  Endpoint: /{args.endpoint}")
+    print(f"Throughput: {len(latencies_ms) / elapsed:,.1f} req/s")
+    print(f"Latency ms  p50={q[49]:.2f}  p95={q[94]:.2f}  p99={q[98]:.2f}  max={latencies_ms[-1]:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BearCart dashboard load tests")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sessions", help="RSS vs number of concurrent dashboard sessions")
+    p.add_argument("--csv", default=data_store.SOURCE_FILE)
+    p.add_argument("--mode", choices=["shared", "copy", "both"], default="both")
+    p.add_argument("--max-sessions", type=int, default=32)
+    p.set_defaults(func=sessions_test)
+
+    p = sub.add_parser("service", help="Latency and throughput of kpi_service.py")
+    p.add_argument("--csv", default=data_store.SOURCE_FILE)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--endpoint", choices=["kpis", "view"], default="kpis")
+    p.add_argument("--concurrency", type=int, default=50)
+    p.add_argument("--requests", type=int, default=2000)
+    p.set_defaults(func=service_test)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import sys
+import time
+import argparse
+
+import data_store
+import kpi_engine
+import sampling
+import stores
+import view_cache
+
+# ======================================================
+# CACHE PRE-WARM JOB
+# ======================================================
+# ETL build ke baad chalaya jata hai (Add_refunds.py khud call karta hai).
+# Default view aur har device x source combination ko standard ranges
+# (last 30/90/365 days + full history) ke liye pehle se compute karke
+# view cache mein daal deta hai, taaki pehla click bhi cache se serve ho.
+# Fast mode ke liye stratified sample aur cold start ka startup manifest
+# bhi yahin bante hain.
+
+
+def run(csv_path=data_store.SOURCE_FILE, store_dir=data_store.STORE_DIR):
+    start = time.perf_counter()
+    store = data_store.DataStore(data_store.build_store(csv_path, store_dir))
+    print(f"Store built: {store.n_rows:,} rows ({time.perf_counter() - start:.2f}s)")
+
+    # Purane dataset version ke views ab kisi kaam ke nahi
+    removed = view_cache.clear_views(store)
+    if removed:
+        print(f"Removed {removed} stale cached views.")
+
+    combos = list(kpi_engine.filter_combinations(store, kpi_engine.standard_ranges(store)))
+    warm_start = time.perf_counter()
+    default_view = None
+    for range_name, date_range, device, source in combos:
+        filtered_df = store.frame(store.select(date_range, device, source))
+        view = kpi_engine.compute_view(filtered_df)
+        view_cache.save_view(store, date_range, device, source, view)
+        if (range_name, device, source) == ("full", "All", "All"):
+            default_view = view
+
+    print(f"Pre-warmed {len(combos)} dashboard views in {time.perf_counter() - warm_start:.2f}s")
+
+    # Cold start ke liye startup manifest (bounds, options, default view)
+    manifest_path = data_store.write_manifest(store, kpi_engine.view_to_json(default_view), store_dir)
+    print(f"Startup manifest written: {manifest_path}")
+
+    # Fast mode ka stratified sample bhi isi build ke saath
+    sample = sampling.build_sample(store)
+    sampling.save_sample(store, sample)
+    print(f"Stratified sample saved: {len(sample['rows']):,} rows from {len(sample['population']):,} strata")
+    return len(combos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the dashboard view cache")
+    parser.add_argument("--csv", default=data_store.SOURCE_FILE)
+    parser.add_argument("--store-dir", default=data_store.STORE_DIR)
+    parser.add_argument("--store", help="store partition name (overrides --csv/--store-dir)")
+    args = parser.parse_args(argv)
+    if args.store:
+        store_paths = stores.paths(args.store)
+        args.csv, args.store_dir = store_paths.csv, store_paths.store_dir
+    run(args.csv, args.store_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import os
+import numpy as np
+
+import data_store
+import kpi_engine
+
+# ======================================================
+# STRATIFIED SAMPLE FOR FAST (APPROXIMATE) MODE
+# ======================================================
+# Strata = month x device_type x utm_source. Har stratum se fixed fraction
+# (kam se kam MIN_PER_STRATUM rows) uthate hain. KPIs ko stratified
+# estimator se scale karke 95% confidence interval ke saath dete hain.
+# Jis KPI ke peeche MIN_SUPPORT se kam sampled rows (non-zero contribution)
+# hon, uska estimate nahi dete: 0/1 sampled order par variance 0 aata hai
+# aur "± 0" wala interval sach ko cover nahi karta.
+
+SAMPLE_FILE = "sample.npz"
+SAMPLE_FRACTION = 0.05
+MIN_PER_STRATUM = 30
+Z_95 = 1.96
+MIN_SUPPORT = 30
+
+DAY_NS = 24 * 60 * 60 * 10**9
+
+
+def _strata(store):
+    ts = store.arrays["created_at"]
+    months = ts.view("datetime64[ns]").astype("datetime64[M]").astype("int64")
+    months = months - months.min()
+    # Missing codes (-1) ko 0 par shift karte hain
+    device = store.arrays["device_type"].astype("int64") + 1
+    source = store.arrays["utm_source"].astype("int64") + 1
+    n_device = len(store.categories["device_type"]) + 1
+    n_source = len(store.categories["utm_source"]) + 1
+    return (months * n_device + device) * n_source + source
+
+
+def build_sample(store, fraction=SAMPLE_FRACTION, min_per_stratum=MIN_PER_STRATUM, seed=0):
+    """Draw a stratified random sample of store rows (vectorised, no per-row Python)."""
+    rng = np.random.default_rng(seed)
+    strata = _strata(store)
+    order = np.lexsort((rng.random(len(strata)), strata))
+    sorted_strata = strata[order]
+
+    labels, starts, sizes = np.unique(sorted_strata, return_index=True, return_counts=True)
+    wanted = np.minimum(sizes, np.maximum(min_per_stratum, np.ceil(fraction * sizes).astype("int64")))
+
+    group = np.repeat(np.arange(len(labels)), sizes)
+    rank = np.arange(len(sorted_strata)) - starts[group]
+    keep = rank < wanted[group]
+
+    rows = np.sort(order[keep])
+    # Kaunsi rows session / order ke roop mein ginti hain - exact KPIs wali definition
+    sessions, orders = kpi_engine.counted_rows(store)
+    return {
+        "rows": rows,
+        "stratum": np.searchsorted(labels, strata[rows]),
+        "population": sizes,
+        "sample_size": wanted,
+        "session_row": sessions[rows],
+        "order_row": orders[rows],
+    }
+
+
+def save_sample(store, sample):
+    path = os.path.join(store.path, SAMPLE_FILE)
+    tmp = data_store.tmp_path(path)
+    with open(tmp, "wb") as f:
+        np.savez(f, version=np.array(store.version), **sample)
+    os.replace(tmp, path)
+
+
+SAMPLE_KEYS = ("rows", "stratum", "population", "sample_size", "session_row", "order_row")
+
+
+def load_sample(store):
+    """Load the precomputed sample, or build one if it is missing, stale or from an older layout."""
+    path = os.path.join(store.path, SAMPLE_FILE)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if str(data["version"]) == store.version and set(SAMPLE_KEYS) <= set(data.files):
+                return {key: data[key] for key in SAMPLE_KEYS}
+    return build_sample(store)
+
+
+def _filter_mask(store, rows, date_range, device, source):
+    mask = np.ones(len(rows), dtype=bool)
+    if date_range is not None and len(date_range) == 2:
+        ts = store.arrays["created_at"].take(rows)
+        start = np.datetime64(date_range[0], "ns").astype("int64")
+        end = np.datetime64(date_range[1], "ns").astype("int64") + DAY_NS
+        mask &= (ts >= start) & (ts < end)
+    if device != "All":
+        mask &= store.arrays["device_type"].take(rows) == store.code_of("device_type", device)
+    if source != "All":
+        mask &= store.arrays["utm_source"].take(rows) == store.code_of("utm_source", source)
+    return mask
+
+
+def _total(values, sample):
+    """Stratified estimate of a population total and its variance."""
+    stratum, N, n = sample["stratum"], sample["population"], sample["sample_size"]
+    sums = np.bincount(stratum, weights=values, minlength=len(N))
+    sq_sums = np.bincount(stratum, weights=values * values, minlength=len(N))
+    means = sums / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s2 = np.where(n > 1, (sq_sums - n * means * means) / (n - 1), 0.0)
+    estimate = float((N * means).sum())
+    variance = float((N * N * (1 - n / N) * np.maximum(s2, 0) / n).sum())
+    return estimate, variance
+
+
+def estimate_kpis(store, sample, date_range=None, device="All", source="All", z=Z_95,
+                  min_support=MIN_SUPPORT):
+    """Approximate dashboard KPIs as {name: (estimate, ci_half_width)}.
+
+    KPIs backed by fewer than min_support sampled rows come back as None.
+    """
+    rows = sample["rows"]
+    inside = _filter_mask(store, rows, date_range, device, source).astype("float64")
+    conv = sample["order_row"] * inside
+
+    def order_values(col):
+        if col not in store.arrays:
+            return np.zeros(len(rows))
+        return np.nan_to_num(store.arrays[col].take(rows)) * conv
+
+    series = {
+        "total_traffic": sample["session_row"] * inside,
+        "total_orders": conv,
+        "total_revenue": order_values("price_usd"),
+        "total_profit": order_values("adjusted_net_profit"),
+        "items_sold": order_values("items_purchased"),
+        "total_refunds": order_values("refund_amount_usd"),
+    }
+    support = {name: np.count_nonzero(values) for name, values in series.items()}
+    totals = {name: _total(values, sample) for name, values in series.items()}
+    result = {name: (est, z * np.sqrt(var)) if support[name] >= min_support else None
+              for name, (est, var) in totals.items()}
+
+    # Ratios: linearisation (z = y - R x) se variance
+    for name, num, den, scale in [("aov", "total_revenue", "total_orders", 1),
+                                  ("conversion_rate", "total_orders", "total_traffic", 100)]:
+        den_est = totals[den][0]
+        if min(support[num], support[den]) < min_support or den_est <= 0:
+            result[name] = None
+            continue
+        ratio = totals[num][0] / den_est
+        _, var = _total(series[num] - ratio * series[den], sample)
+        result[name] = (ratio * scale, z * np.sqrt(var) / den_est * scale)
+    return result
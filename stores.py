@@ -0,0 +1,65 @@
+import os
+from collections import namedtuple
+
+import data_store
+
+# ======================================================
+# STORE PARTITIONS
+# ======================================================
+# Har storefront ka same schema hai, bas files alag folder mein:
+#
+#   ./orders.csv, ./website_sessions.csv, ...      -> default store ("bearcart")
+#   stores/<name>/orders.csv, ...                   -> baaki storefronts
+#
+# ETL output (master CSV + column store) bhi usi folder mein banta hai.
+
+STORES_ROOT = "stores"
+DEFAULT_STORE = "bearcart"
+INPUT_FILES = ["products.csv", "orders.csv", "website_sessions.csv", "order_item_refunds.csv"]
+
+StorePaths = namedtuple("StorePaths", ["name", "root", "csv", "store_dir"])
+
+
+def paths(name=DEFAULT_STORE):
+    root = "." if name == DEFAULT_STORE else os.path.join(STORES_ROOT, name)
+    return StorePaths(
+        name=name,
+        root=root,
+        csv=os.path.join(root, data_store.SOURCE_FILE),
+        store_dir=os.path.join(root, data_store.STORE_DIR),
+    )
+
+
+def input_path(name, filename):
+    return os.path.join(paths(name).root, filename)
+
+
+def is_built(store_paths):
+    """ETL output (master CSV or a finished column store) exists for this partition."""
+    return (
+        os.path.exists(store_paths.csv)
+        or os.path.exists(os.path.join(store_paths.store_dir, data_store.META_FILE))
+    )
+
+
+def _has_inputs(store_paths):
+    return any(os.path.exists(os.path.join(store_paths.root, f)) for f in INPUT_FILES)
+
+
+def _partitions():
+    names = [DEFAULT_STORE]
+    if os.path.isdir(STORES_ROOT):
+        for name in sorted(os.listdir(STORES_ROOT)):
+            if name != DEFAULT_STORE and os.path.isdir(os.path.join(STORES_ROOT, name)):
+                names.append(name)
+    return names
+
+
+def list_stores():
+    """Default store first, then every partition under stores/ that the ETL has built."""
+    return [name for name in _partitions() if is_built(paths(name))]
+
+
+def pending_stores():
+    """Partitions with raw input files but no ETL output yet."""
+    return [name for name in _partitions() if not is_built(paths(name)) and _has_inputs(paths(name))]
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# ======================================================
+# RUNTIME PERFORMANCE TELEMETRY
+# ======================================================
+# Har dashboard section ka time, cache hit/miss counters aur slow reruns.
+# Cache lookups ka latency bhi "cache:<name>" section mein jata hai.
+# Ek process-wide Telemetry object (dashboard mein st.cache_resource) saare
+# sessions ka data rolling window mein rakhta hai:
+#
+#   http://127.0.0.1:8766/metrics        (text)
+#   http://127.0.0.1:8766/metrics.json   (JSON)
+
+WINDOW = 1000
+SLOW_RERUN_SECONDS = float(os.environ.get("BEARCART_SLOW_RERUN_SECONDS", "2.0"))
+METRICS_HOST = os.environ.get("BEARCART_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("BEARCART_METRICS_PORT", "8766"))
+
+logger = logging.getLogger("bearcart.telemetry")
+
+
+class Telemetry:
+    def __init__(self, window=WINDOW, slow_rerun_seconds=SLOW_RERUN_SECONDS):
+        self.lock = threading.Lock()
+        self.window = window
+        self.slow_rerun_seconds = slow_rerun_seconds
+        self.latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self.counts = defaultdict(int)
+        self.cache_lookups = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+        self.slow_reruns = deque(maxlen=50)
+        self.started_at = time.time()
+
+    # ---------------- Recording ----------------
+    def record(self, section, seconds):
+        with self.lock:
+            self.latencies[section].append(seconds)
+            self.counts[section] += 1
+
+    def cache_lookup(self, name, hit=None, seconds=None):
+        """Count a lookup; pass hit=True/False when the caller already knows, seconds to time it."""
+        with self.lock:
+            self.cache_lookups[name] += 1
+            if hit is False:
+                self.cache_misses[name] += 1
+        if seconds is not None:
+            self.record(f"cache:{name}", seconds)
+
+    @contextmanager
+    def lookup(self, name):
+        """Count a cache lookup and time the block as section "cache:<name>"."""
+        # Count pehle: cached function ka cache_miss body ke andar se aata hai
+        self.cache_lookup(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(f"cache:{name}", time.perf_counter() - start)
+
+    def cache_miss(self, name):
+        # Cached function ke body se call hota hai - body sirf miss par chalti hai
+        with self.lock:
+            self.cache_misses[name] += 1
+
+    def begin_rerun(self):
+        return RerunTimer(self)
+
+    # ---------------- Reporting ----------------
+    def snapshot(self):
+        with self.lock:
+            sections = {}
+            for section, values in self.latencies.items():
+                ms = np.array(values) * 1000
+                sections[section] = {
+                    "count": self.counts[section],
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "p99_ms": float(np.percentile(ms, 99)),
+                    "max_ms": float(ms.max()),
+                    "last_ms": float(ms[-1]),
+                }
+            caches = {}
+            for name, lookups in self.cache_lookups.items():
+                misses = min(self.cache_misses[name], lookups)
+                caches[name] = {
+                    "lookups": lookups,
+                    "hits": lookups - misses,
+                    "misses": misses,
+                    "hit_ratio": (lookups - misses) / lookups if lookups else 0.0,
+                }
+            return {
+                "uptime_seconds": time.time() - self.started_at,
+                "window": self.window,
+                "sections": sections,
+                "caches": caches,
+                "slow_reruns": list(self.slow_reruns),
+            }
+
+    def to_text(self):
+        snap = self.snapshot()
+        lines = [f"bearcart_uptime_seconds {snap['uptime_seconds']:.0f}"]
+        for section, stats in sorted(snap["sections"].items()):
+            lines.append(f'bearcart_section_count{{section="{section}"}} {stats["count"]}')
+            for q in ("p50", "p95", "p99"):
+                lines.append(f'bearcart_section_latency_ms{{section="{section}",quantile="{q}"}} {stats[q + "_ms"]:.3f}')
+        for name, stats in sorted(snap["caches"].items()):
+            lines.append(f'bearcart_cache_lookups{{cache="{name}"}} {stats["lookups"]}')
+            lines.append(f'bearcart_cache_hit_ratio{{cache="{name}"}} {stats["hit_ratio"]:.4f}')
+        lines.append(f"bearcart_slow_reruns {len(snap['slow_reruns'])}")
+        return "\n".join(lines) + "\n"
+
+
+class RerunTimer:
+    """Lap timer for one script rerun: each lap() closes the section since the last one."""
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+        self.start = self.last = time.perf_counter()
+        self.laps = {}
+
+    def lap(self, section):
+        now = time.perf_counter()
+        self.laps[section] = now - self.last
+        self.telemetry.record(section, now - self.last)
+        self.last = now
+
+    def finish(self, filters):
+        total = time.perf_counter() - self.start
+        self.telemetry.record("rerun_total", total)
+        if total >= self.telemetry.slow_rerun_seconds:
+            entry = {
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "total_ms": round(total * 1000, 1),
+                "filters": filters,
+                "sections_ms": {k: round(v * 1000, 1) for k, v in self.laps.items()},
+            }
+            with self.telemetry.lock:
+                self.telemetry.slow_reruns.append(entry)
+            logger.warning("Slow rerun: %s", json.dumps(entry, default=str))
+        return total
+
+
+# ---------------- Metrics endpoint ----------------
+def start_metrics_server(telemetry, host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics and /metrics.json from a daemon thread. Returns None if the port is busy."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = telemetry.to_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(telemetry.snapshot(), default=str).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started on %s:%s (%s)", host, port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="bearcart-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,263 @@
+import json
+import time
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import enrich
+
+# ======================================================
+# DATA QUALITY VALIDATION
+# ======================================================
+# ETL chupchaap bahut kuch theek karta hai: null price/cogs mean se bhar
+# dete hain, missing user_id session se aata hai, kharab order lines skip
+# ho jati hain. Ye stage har input par schema, range, duplicate aur
+# referential (sessions -> orders -> products, refunds -> orders) checks
+# chalata hai - sab column-level NumPy/pandas masks, koi per-row Python nahi.
+# Har check ka count aur kuch offending rows quality report mein jate hain.
+
+REPORT_FILE = "BearCart_Quality_Report.json"
+SAMPLE_ROWS = 5
+
+# Column kinds: id (non-negative integer), flag (0/1), count (>= 1),
+# money (>= 0), datetime, text (sirf presence check)
+SCHEMAS = {
+    "website_sessions": {
+        "key": "website_session_id",
+        "columns": {
+            "website_session_id": "id", "created_at": "datetime", "user_id": "id",
+            "is_repeat_session": "flag", "utm_source": "text", "utm_campaign": "text",
+            "utm_content": "text", "device_type": "text", "http_referer": "text",
+        },
+    },
+    "orders": {
+        "key": "order_id",
+        "columns": {
+            "order_id": "id", "created_at": "datetime", "website_session_id": "id", "user_id": "id",
+            "primary_product_id": "id", "items_purchased": "count", "price_usd": "money", "cogs_usd": "money",
+        },
+    },
+    "refunds": {
+        "key": "order_item_refund_id",
+        "columns": {
+            "order_item_refund_id": "id", "created_at": "datetime", "order_item_id": "id",
+            "order_id": "id", "refund_amount_usd": "money",
+        },
+    },
+    "products": {
+        "key": "product_id",
+        "columns": {"product_id": "id", "created_at": "datetime", "product_name": "text"},
+    },
+}
+
+# Ye nulls error nahi hain, ETL inhe bharta hai - par report mein dikhne chahiye
+IMPUTED = {
+    ("orders", "price_usd"): "null_mean_imputed",
+    ("orders", "cogs_usd"): "null_mean_imputed",
+    ("orders", "user_id"): "null_filled_from_session",
+}
+NULLABLE_KINDS = {"text"}
+
+
+class QualityReport:
+    """Per-check failure counts plus a few offending rows, safe to fill from loader threads."""
+
+    def __init__(self, sample_rows=SAMPLE_ROWS):
+        self.lock = threading.Lock()
+        self.sample_rows = sample_rows
+        self.checks = []
+        self.rows = {}
+        self.seconds = defaultdict(float)
+
+    def add(self, source, check, df, mask):
+        positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+        sample = []
+        if len(positions):
+            sample = df.iloc[positions[:self.sample_rows]].reset_index(names="row").to_dict("records")
+        self.add_count(source, check, len(positions), sample)
+
+    def add_count(self, source, check, failed, sample=()):
+        with self.lock:
+            self.checks.append({"source": source, "check": check, "failed": int(failed), "sample": list(sample)})
+
+    def timed(self, source, seconds):
+        with self.lock:
+            self.seconds[source] += seconds
+
+    @property
+    def total_seconds(self):
+        return sum(self.seconds.values())
+
+    def sorted_checks(self):
+        # Loader threads alag order mein likhte hain; report source-wise stable rahe
+        return sorted(self.checks, key=lambda c: list(SCHEMAS).index(c["source"]))
+
+    def failures(self):
+        return [c for c in self.sorted_checks() if c["failed"]]
+
+    def to_frame(self):
+        return pd.DataFrame(
+            [(c["source"], c["check"], c["failed"]) for c in self.sorted_checks()],
+            columns=["source", "check", "failed"],
+        )
+
+    def summary(self):
+        lines = [f"{len(self.checks)} checks, {len(self.failures())} with findings "
+                 f"(validation time {self.total_seconds:.2f}s)"]
+        for c in self.failures():
+            rows = self.rows.get(c["source"])
+            share = f" ({c['failed'] / rows:.3%})" if rows else ""
+            lines.append(f"  {c['source']:<17}{c['check']:<32}{c['failed']:>10,}{share}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": self.rows,
+            "seconds": dict(self.seconds),
+            "checks": self.sorted_checks(),
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
+
+
+class BadLines:
+    """on_bad_lines callable (engine='python') that counts and samples skipped lines."""
+
+    def __init__(self, sample_rows=SAMPLE_ROWS):
+        self.count = 0
+        self.sample = []
+        self.sample_rows = sample_rows
+
+    def __call__(self, line):
+        self.count += 1
+        if len(self.sample) < self.sample_rows:
+            self.sample.append({"line": ",".join(line)})
+        return None  # skip, jaise pehle on_bad_lines='skip' karta tha
+
+    def report_to(self, report, source):
+        report.add_count(source, "malformed_line_skipped", self.count, self.sample)
+
+
+# ---------------- Per-source checks ----------------
+def _numeric(series):
+    values = pd.to_numeric(series, errors="coerce")
+    return values.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _datetime(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, errors="coerce", format="ISO8601")
+
+
+def check_source(report, source, df):
+    """Schema, completeness, range and duplicate-key checks for one input frame."""
+    start = time.perf_counter()
+    schema = SCHEMAS[source]
+    with report.lock:
+        report.rows[source] = len(df)
+    missing = [col for col in schema["columns"] if col not in df.columns]
+    report.add_count(source, "schema_missing_columns", len(missing), [{"column": col} for col in missing])
+
+    values = {}
+    for col, kind in schema["columns"].items():
+        if col not in df.columns:
+            continue
+        null = df[col].isna().to_numpy()
+        if kind not in NULLABLE_KINDS:
+            report.add(source, f"{col}:" + IMPUTED.get((source, col), "null"), df, null)
+        if kind == "text":
+            continue
+
+        if kind == "datetime":
+            parsed = _datetime(df[col])
+            report.add(source, f"{col}:unparseable", df, parsed.isna().to_numpy() & ~null)
+            report.add(source, f"{col}:in_future", df, (parsed > pd.Timestamp.now()).to_numpy())
+            continue
+
+        numbers = _numeric(df[col])
+        values[col] = numbers
+        report.add(source, f"{col}:not_numeric", df, np.isnan(numbers) & ~null)
+        with np.errstate(invalid="ignore"):
+            if kind == "id":
+                bad = (numbers < 0) | (numbers != np.floor(numbers))
+            elif kind == "flag":
+                bad = (numbers != 0) & (numbers != 1)
+            elif kind == "count":
+                bad = (numbers < 1) | (numbers != np.floor(numbers))
+            else:
+                bad = numbers < 0
+        report.add(source, f"{col}:out_of_range", df, bad & ~np.isnan(numbers))
+
+    # Source-specific range rules
+    with np.errstate(invalid="ignore"):
+        if source == "orders" and {"price_usd", "cogs_usd"} <= values.keys():
+            report.add(source, "cogs_above_price", df, values["cogs_usd"] > values["price_usd"])
+        if source == "refunds" and "refund_amount_usd" in values:
+            report.add(source, "refund_amount_zero", df, values["refund_amount_usd"] == 0)
+
+    key = schema["key"]
+    if key in df.columns:
+        check_duplicates(report, source, df, key)
+    report.timed(source, time.perf_counter() - start)
+    return df
+
+
+def check_duplicates(report, source, df, key):
+    """Duplicate keys, split into exact copies and conflicting rows (same key, different data)."""
+    key_dup = df.duplicated(key, keep=False).to_numpy()
+    report.add(source, "duplicate_key", df, df.duplicated(key).to_numpy())
+    # Full-row comparison sirf duplicate keys wali rows par (poora frame hash nahi karte)
+    positions = np.flatnonzero(key_dup)
+    subset = df.iloc[positions]
+    distinct = subset.drop_duplicates()
+    conflicting = np.zeros(len(df), dtype=bool)
+    conflicting[positions] = subset[key].isin(distinct.loc[distinct[key].duplicated(keep=False), key]).to_numpy()
+    report.add(source, "conflicting_duplicate", df, conflicting)
+
+
+def checker(report, source):
+    """Prepare step for ingest.source(): validate the raw frame in the loader thread."""
+    return lambda df: check_source(report, source, df)
+
+
+# ---------------- Referential integrity ----------------
+def _positions(keys, reference):
+    """Row position of each key in reference (-1 when absent); dense lookup when possible."""
+    index = enrich.dense_index(reference)
+    if index is not None:
+        return enrich.lookup(index, keys)
+    # Duplicate / sparse ids: hash index par last occurrence
+    ref = pd.Series(np.arange(len(reference)), index=pd.Index(reference))
+    ref = ref[~ref.index.duplicated(keep="last")]
+    return ref.index.get_indexer(pd.Index(keys)).astype("int64")
+
+
+def check_references(report, sessions, orders, products, refunds_grouped):
+    """sessions -> orders -> products and refunds -> orders consistency checks."""
+    start = time.perf_counter()
+
+    session_pos = _positions(orders["website_session_id"], sessions["website_session_id"])
+    report.add("orders", "orphan_session_id", orders, session_pos < 0)
+
+    order_users = _numeric(orders["user_id"])
+    session_users = enrich.gather(sessions["user_id"], session_pos).astype("float64")
+    with np.errstate(invalid="ignore"):
+        mismatch = (order_users != session_users) & ~np.isnan(order_users) & ~np.isnan(session_users)
+    report.add("orders", "user_id_differs_from_session", orders, mismatch)
+
+    product_pos = _positions(orders["primary_product_id"], products["product_id"])
+    report.add("orders", "unknown_product_id", orders, product_pos < 0)
+
+    order_pos = _positions(refunds_grouped["order_id"], orders["order_id"])
+    report.add("refunds", "orphan_order_id", refunds_grouped, order_pos < 0)
+    order_price = enrich.gather(orders["price_usd"], order_pos).astype("float64")
+    with np.errstate(invalid="ignore"):
+        report.add("refunds", "refund_above_order_price", refunds_grouped,
+                   refunds_grouped["refund_amount_usd"].to_numpy(dtype="float64") > order_price + 0.005)
+
+    report.timed("references", time.perf_counter() - start)
@@ -0,0 +1,62 @@
+import os
+import pickle
+import hashlib
+
+import data_store
+
+# ======================================================
+# ON-DISK VIEW CACHE
+# ======================================================
+# Ek filter selection ka poora view (KPIs + chart aggregates) pickle karke
+# store directory ke andar rakhte hain. Pre-warm job isko bharta hai,
+# dashboard pehle yahan dekhta hai.
+
+VIEWS_DIR = "views"
+
+
+def _views_dir(store):
+    return os.path.join(store.path, VIEWS_DIR)
+
+
+def view_key(store, date_range, device, source):
+    start, end = (date_range[0], date_range[1]) if len(date_range) == 2 else (None, None)
+    raw = f"{store.version}|{start}|{end}|{device}|{source}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _view_path(store, date_range, device, source):
+    return os.path.join(_views_dir(store), view_key(store, date_range, device, source) + ".pkl")
+
+
+def has_view(store, date_range, device, source):
+    return os.path.exists(_view_path(store, date_range, device, source))
+
+
+def load_view(store, date_range, device, source):
+    path = _view_path(store, date_range, device, source)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def save_view(store, date_range, device, source, view):
+    views_dir = _views_dir(store)
+    os.makedirs(views_dir, exist_ok=True)
+    path = _view_path(store, date_range, device, source)
+    tmp_path = data_store.tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        pickle.dump(view, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def clear_views(store):
+    views_dir = _views_dir(store)
+    if not os.path.isdir(views_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(views_dir):
+        os.remove(os.path.join(views_dir, name))
+        removed += 1
+    return removed